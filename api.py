@@ -0,0 +1,350 @@
+import hashlib
+import sqlite3
+from functools import wraps
+from urllib.parse import parse_qsl
+
+from flask import Blueprint, Response, jsonify, request
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException, MethodNotAllowed
+from werkzeug.routing import Map, Rule
+
+from models import ApiToken, Project, Task, db
+from models.cache import get_version
+
+# JSON API for integrations, authenticated with bearer tokens instead of the session cookie
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# Maximum number of operations in one batch request
+BATCH_LIMIT = 1000
+# Fields of tasks and projects that clients may set, with the JSON types they accept
+# (text and dates are strings, null clears them)
+_TEXT = (str, type(None))
+TASK_FIELDS = {
+    "title": _TEXT,
+    "description": _TEXT,
+    "detailed_description": _TEXT,
+    "project_id": (int, type(None)),
+    "deadline": _TEXT,
+    "status": _TEXT,
+    "priority": _TEXT,
+    "completed_date": _TEXT,
+}
+PROJECT_FIELDS = {
+    "title": _TEXT,
+    "description": _TEXT,
+    "detailed_description": _TEXT,
+    "start_date": _TEXT,
+    "deadline": _TEXT,
+    "status": _TEXT,
+    "priority": _TEXT,
+}
+
+# Operations by path and method, shared by the HTTP routes and /batch
+_operations = Map()
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def operation(rule, methods):
+    """
+    Registers an API operation: a function (user_id, args, body, **path values) -> (status, payload)
+    served at `rule` for the given methods, and available to batch requests.
+    """
+
+    def decorator(handler):
+        _operations.add(Rule(rule, methods=methods, endpoint=handler))
+        api.add_url_rule(rule, handler.__name__, _view(handler), methods=methods)
+        return handler
+
+    return decorator
+
+
+def _call(handler, user_id, args, body, path_values):
+    """
+    Runs an operation and turns its errors into (status, {"error": message}).
+    """
+    try:
+        return handler(user_id, args, body, **path_values)
+    except ApiError as e:
+        return e.status, {"error": str(e)}
+    except (ValueError, TypeError, sqlite3.IntegrityError) as e:
+        return 400, {"error": str(e)}
+
+
+def _authenticate():
+    """
+    Returns the ID of the user whose token is in the Authorization header, or None.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return ApiToken.authenticate(token.strip())
+
+
+def _unauthorized():
+    response = jsonify({"error": "A valid API token is required"})
+    response.status_code = 401
+    response.headers["WWW-Authenticate"] = 'Bearer realm="api"'
+    return response
+
+
+def _view(handler):
+    """
+    Wraps an operation into a Flask view: token authentication, JSON in and out, and for reads
+    a weak ETag from the user's data version and the URL, checked before the operation runs.
+    """
+
+    @wraps(handler)
+    def view(**path_values):
+        user_id = _authenticate()
+        if user_id is None:
+            return _unauthorized()
+
+        etag = None
+        if request.method == "GET":
+            # Each URL (path and query string) gets its own validator: an ETag of one list must not
+            # revalidate another list of the same user
+            url_digest = hashlib.sha256(request.full_path.encode()).hexdigest()[:16]
+            etag = f"api-{user_id}-{get_version(user_id)}-{url_digest}"
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag, weak=True)
+                response.headers["Cache-Control"] = "private, no-cache"
+                return response
+
+        body = None
+        if request.method in ("POST", "PATCH"):
+            body = request.get_json(silent=True)
+            if not isinstance(body, dict):
+                return jsonify({"error": "The request body must be a JSON object"}), 400
+
+        status, payload = _call(handler, user_id, request.args, body, path_values)
+        response = jsonify(payload) if payload is not None else Response()
+        response.status_code = status
+        if etag and status == 200:
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    return view
+
+
+def _serialize(record):
+    """
+    Returns a record as a JSON-ready dict, with dates as stored (ISO-8601 strings).
+    """
+    return {key: record.raw(key) for key in record}
+
+
+def _fields(body, allowed):
+    """
+    Returns the allowed fields of a request body; unknown fields and values of the wrong JSON type
+    are an error.
+    """
+    unknown = set(body) - set(allowed)
+    if unknown:
+        raise ApiError(400, f"Unknown field: {', '.join(sorted(unknown))}")
+    for field, value in body.items():
+        # JSON true and false are Python bools, which are also ints
+        if isinstance(value, bool) or not isinstance(value, allowed[field]):
+            expected = "an integer" if int in allowed[field] else "a string"
+            raise ApiError(400, f"{field} must be {expected} or null")
+    return dict(body)
+
+
+def _page(args):
+    """
+    Reads the `after` and `limit` pagination parameters.
+    """
+    try:
+        after = int(args.get("after", 0))
+        limit = int(args.get("limit", 100))
+    except ValueError:
+        raise ApiError(400, "after and limit must be integers") from None
+    if limit < 1:
+        raise ApiError(400, "limit must be positive")
+    return after, limit
+
+
+def _listing(records, limit):
+    data = [_serialize(record) for record in records]
+    # A full page may be followed by another one
+    next_after = data[-1]["id"] if data and len(data) == limit else None
+    return {"data": data, "next_after": next_after}
+
+
+def _task(user_id, task_id):
+    tasks = Task.get(user_id, id=task_id)
+    if not tasks:
+        raise ApiError(404, "Task not found")
+    return tasks[0]
+
+
+def _project(user_id, project_id):
+    projects = Project.get(project_id, user_id)
+    if not projects:
+        raise ApiError(404, "Project not found")
+    return projects[0]
+
+
+@operation("/tasks", ["GET"])
+def list_tasks(user_id, args, body):
+    """
+    Lists tasks in ID order. Filters: status, priority, project_id ('none' for no project).
+    Pagination: after (last ID of the previous page) and limit.
+    """
+    after, limit = _page(args)
+    filters = {key: args[key] for key in ("status", "priority") if key in args}
+    if "project_id" in args:
+        filters["project_id"] = None if args["project_id"] == "none" else int(args["project_id"])
+    limit = min(limit, Task.LIST_LIMIT)
+    return 200, _listing(Task.list(user_id, after=after, limit=limit, **filters), limit)
+
+
+@operation("/tasks", ["POST"])
+def create_task(user_id, args, body):
+    fields = _fields(body, TASK_FIELDS)
+    if fields.get("project_id") is not None:
+        _project(user_id, fields["project_id"])
+    task_id = Task.create(fields.pop("title", None), fields.pop("description", None), user_id, **fields)
+    return 201, _serialize(_task(user_id, task_id))
+
+
+@operation("/tasks/<int:task_id>", ["GET"])
+def get_task(user_id, args, body, task_id):
+    return 200, _serialize(_task(user_id, task_id))
+
+
+@operation("/tasks/<int:task_id>", ["PATCH"])
+def update_task(user_id, args, body, task_id):
+    fields = _fields(body, TASK_FIELDS)
+    _task(user_id, task_id)
+    if fields.get("project_id") is not None:
+        _project(user_id, fields["project_id"])
+    Task.update(task_id, user_id, **fields)
+    return 200, _serialize(_task(user_id, task_id))
+
+
+@operation("/tasks/<int:task_id>", ["DELETE"])
+def delete_task(user_id, args, body, task_id):
+    _task(user_id, task_id)
+    Task.delete(task_id, user_id)
+    return 204, None
+
+
+@operation("/projects", ["GET"])
+def list_projects(user_id, args, body):
+    """
+    Lists projects in ID order. Filter: status. Pagination: after and limit.
+    """
+    after, limit = _page(args)
+    status = args.get("status")
+    if status is not None:
+        Task.validate_status(status)
+    limit = min(limit, Project.LIST_LIMIT)
+    return 200, _listing(Project.list(user_id, after=after, limit=limit, status=status), limit)
+
+
+def _validate_project(fields):
+    if "status" in fields:
+        Task.validate_status(fields["status"])
+    if "priority" in fields:
+        Task.validate_priority(fields["priority"])
+
+
+@operation("/projects", ["POST"])
+def create_project(user_id, args, body):
+    fields = _fields(body, PROJECT_FIELDS)
+    if not fields.get("title"):
+        raise ApiError(400, "Title is required")
+    _validate_project(fields)
+    project_id = Project.create(fields.pop("title"), fields.pop("description", ""), user_id, **fields)
+    return 201, _serialize(_project(user_id, project_id))
+
+
+@operation("/projects/<int:project_id>", ["GET"])
+def get_project(user_id, args, body, project_id):
+    return 200, _serialize(_project(user_id, project_id))
+
+
+@operation("/projects/<int:project_id>", ["PATCH"])
+def update_project(user_id, args, body, project_id):
+    fields = _fields(body, PROJECT_FIELDS)
+    _project(user_id, project_id)
+    _validate_project(fields)
+    Project.update(project_id, user_id, **fields)
+    return 200, _serialize(_project(user_id, project_id))
+
+
+@operation("/projects/<int:project_id>", ["DELETE"])
+def delete_project(user_id, args, body, project_id):
+    _project(user_id, project_id)
+    Project.delete(project_id, user_id)
+    return 204, None
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _batch_operation(adapter, user_id, item):
+    """
+    Runs one operation of a batch: {"method", "path", "body"}. Returns (status, payload).
+    """
+    path, _, query = str(item.get("path", "")).partition("?")
+    if path.startswith(api.url_prefix):
+        path = path[len(api.url_prefix):]
+    body = item.get("body") or {}
+    try:
+        handler, path_values = adapter.match(path, str(item.get("method", "GET")).upper())
+    except MethodNotAllowed:
+        return 405, {"error": "Method not allowed"}
+    except HTTPException:
+        return 404, {"error": "Not found"}
+    if not isinstance(body, dict):
+        return 400, {"error": "body must be a JSON object"}
+    return _call(handler, user_id, MultiDict(parse_qsl(query)), body, path_values)
+
+
+@api.route("/batch", methods=["POST"])
+def batch():
+    """
+    Runs many operations in one request and one transaction:
+    {"atomic": false, "operations": [{"method": "POST", "path": "/tasks", "body": {...}}, ...]}.
+    Returns {"results": [{"status": 201, "body": {...}}, ...]} in the same order.
+    With "atomic": true, the first failing operation rolls back all of them (status 409).
+    """
+    user_id = _authenticate()
+    if user_id is None:
+        return _unauthorized()
+
+    payload = request.get_json(silent=True)
+    operations = payload.get("operations") if isinstance(payload, dict) else None
+    if not isinstance(operations, list) or not all(isinstance(item, dict) for item in operations):
+        return jsonify({"error": "operations must be a list of objects"}), 400
+    if len(operations) > BATCH_LIMIT:
+        return jsonify({"error": f"A batch is limited to {BATCH_LIMIT} operations"}), 400
+    atomic = bool(payload.get("atomic"))
+
+    adapter = _operations.bind("")
+    results = []
+    try:
+        with db.transaction() as connection:
+            for item in operations:
+                # Each operation in its own savepoint: a failed one leaves no partial write behind
+                connection.execute("SAVEPOINT operation")
+                status, result = _batch_operation(adapter, user_id, item)
+                if status >= 400:
+                    connection.execute("ROLLBACK TO operation")
+                connection.execute("RELEASE operation")
+                results.append({"status": status, "body": result})
+                if atomic and status >= 400:
+                    raise _Rollback
+    except _Rollback:
+        return jsonify({"error": "An operation failed; no change was made", "results": results}), 409
+
+    return jsonify({"results": results})
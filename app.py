@@ -1,40 +1,77 @@
 from flask import (
     Flask,
+    Response,
     flash,
+    jsonify,
     redirect,
     render_template,
     request,
     session,
+    stream_with_context,
     url_for, get_flashed_messages,
 )
-from flask_session import Session
+from werkzeug.http import http_date
+import asyncio
+import click
+import hmac
+import os
 import re  # For email validation
 
-from datetime import datetime
-from models import User, Project, Task, init_db
-from helpers import login_required
+from datetime import date, datetime, timedelta
+from models import ApiToken, User, Project, Task, db, init_db
+from models.cache import get_change, query_cache
+from models.ical import feed_validators, feed_window, generate_ics
+from models.passwords import PasswordHashingBusy, password_hasher
+from models.search import rebuild_index, search as search_index
+from models.throttle import login_throttle
+from models.transfer import FORMATS, export_rows, format_for, import_rows
+from api import api
+from compression import Compress
+from helpers import login_required, revalidate
+from sessions import DatabaseSessionInterface
 
 # Configure application
 app = Flask(__name__)
 
-# Configure session to use filesystem (instead of signed cookies)
+# Keep sessions in the database (instead of signed cookies), written only when they change
 app.config["SESSION_PERMANENT"] = False
-app.config["SESSION_TYPE"] = "filesystem"
-Session(app)
+DatabaseSessionInterface(app)
+# Compress HTML, JSON and streamed responses (gzip, or brotli when installed)
+Compress(app)
 init_db()
 
+# Give each request thread's database connection back to the pool when it ends
+app.teardown_appcontext(db.release)
+
+# JSON API under /api/v1
+app.register_blueprint(api)
+
+# Token that /stats requires as a Bearer token; the page is disabled when it is unset
+STATS_TOKEN = os.environ.get("STATS_TOKEN")
+
 
 @app.after_request
 def after_request(response):
     """
-    Ensure responses aren't cached.
+    Ensure responses aren't cached, unless the view set its own caching policy
+    (see helpers.revalidate for the pages that browsers may keep).
     """
+    if "Cache-Control" in response.headers:
+        return response
     response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
     response.headers["Expires"] = 0
     response.headers["Pragma"] = "no-cache"
     return response
 
 
+def busy(template, **context):
+    """
+    Answers a form whose password could not be hashed because every hashing slot is taken.
+    """
+    flash("The server is busy, please try again in a moment.", "error")
+    return render_template(template, **context), 503, {"Retry-After": "5"}
+
+
 @app.route("/register", methods=["GET", "POST"])
 def register():
     """
@@ -80,6 +117,8 @@ def register():
             User.create(username, email, password)
             flash("Account created successfully! Please log in.", "success")
             return render_template("login.html")
+        except PasswordHashingBusy:
+            return busy("register.html", username=username, email=email)
         except Exception as e:
             flash(f"An error occurred: {e}", "error")
             return render_template("register.html", username=username, email=email)
@@ -106,9 +145,19 @@ def login():
             flash("Must provide password", "error")
             return render_template("login.html")
 
+        # Refuse bursts of attempts before spending any CPU on the password
+        wait = login_throttle.attempt(username, request.remote_addr)
+        if wait:
+            flash(f"Too many login attempts. Please try again in {wait} seconds.", "error")
+            return render_template("login.html"), 429, {"Retry-After": str(wait)}
+
         rows = User.get_by_username(username)
+        try:
+            valid = len(rows) == 1 and User.check_password(rows[0]["hash"], password, rows[0]["id"])
+        except PasswordHashingBusy:
+            return busy("login.html")
 
-        if len(rows) != 1 or not User.check_password(rows[0]["hash"], password):
+        if not valid:
             flash("Invalid username and/or password", "error")
             print("invalid usernam mdp")
             return render_template("login.html")
@@ -165,7 +214,10 @@ def profile():
             password = None
 
         # Update the user
-        User.update(session["user_id"], username, email, password)
+        try:
+            User.update(session["user_id"], username, email, password)
+        except PasswordHashingBusy:
+            return busy("profile.html", username=username, email=email)
 
         # Update session data
         if session["user_name"] != username:
@@ -198,55 +250,56 @@ def logout():
 
 @app.route("/")
 @login_required
-def index():
+@revalidate
+async def index():
     """
     Display the dashboard with active projects, ongoing tasks, and statistics.
     """
     user_id = session["user_id"]
 
-    active_projects = Project.get_active_projects(user_id)
-    ongoing_tasks = Task.get_tasks_on_hold(user_id)
-
-    completed_this_week_tasks = Task.get_completed_this_week(user_id)
-    completed_this_week_count = len(completed_this_week_tasks)
-
-    all_tasks = Task.get_all(user_id)
-    all_tasks_count = len(all_tasks)
-
-    done_tasks = Task.get_done(user_id)
-    done_tasks_count = len(done_tasks)
-
-    denominator = all_tasks_count - done_tasks_count + completed_this_week_count
-    if denominator == 0:
-        completed_this_week = 0  # Default value
-    else:
-        completed_this_week = round(
-            (completed_this_week_count / denominator) * 100,
-            1,
-        )
-
-    upcoming_tasks = Task.get_upcoming_tasks(user_id)
-    in_progress_task = Task.get(user_id, status="in progress")
+    # The three reads are independent: run them concurrently on the read pool
+    active_projects, stats, task_lists = await asyncio.gather(
+        Project.get_active_projects_async(user_id),
+        Task.get_dashboard_stats_async(user_id),
+        Task.get_dashboard_lists_async(user_id),
+    )
 
     return render_template(
         "index.html",
         active_projects=active_projects,
-        ongoing_tasks=ongoing_tasks,
-        completed_this_week=completed_this_week,
-        upcoming_tasks=upcoming_tasks,
-        in_progress_task=in_progress_task,
+        stats=stats,
+        ongoing_tasks=task_lists["on_hold"],
+        completed_this_week=stats["completed_this_week_percent"],
+        upcoming_tasks=task_lists["upcoming"],
+        in_progress_task=task_lists["in_progress"],
     )
 
 
 @app.route("/projects")
 @login_required
+@revalidate
 def projects():
     """
     Display all projects for the user.
     """
     user_id = session["user_id"]
-    projects = Project.get_all(user_id)
-    return render_template("projects.html", projects=projects)
+    projects, next_cursor = Project.get_page(user_id)
+    return render_template("projects.html", projects=projects, next_cursor=next_cursor)
+
+
+@app.route("/projects/more")
+@login_required
+def more_projects():
+    """
+    Render the next page of the user's projects for the "Load more" button of the projects page.
+    """
+    try:
+        projects, next_cursor = Project.get_page(
+            session["user_id"], after=request.args.get("after")
+        )
+    except ValueError as e:
+        return str(e), 400
+    return render_template("project_cards.html", projects=projects, next_cursor=next_cursor)
 
 
 @app.route("/add_project", methods=["GET", "POST"])
@@ -346,14 +399,9 @@ def delete_project(project_id):
     Delete a project.
     """
     try:
-        # Delete a project using the Project model
-        task_to_update = Task.get(user_id=session["user_id"], project_id=project_id)
-
-        for task in task_to_update:
-            Task.update(task["id"], user_id=session["user_id"], project_id=None)
-
-        Project.delete(project_id, session["user_id"])
-        flash("Project deleted successfully!", "success")
+        # Delete a project using the Project model (its tasks are detached, not deleted)
+        detached = Project.delete(project_id, session["user_id"])
+        flash(f"Project deleted successfully! {detached} task(s) unlinked.", "success")
     except Exception as e:
         flash(f"An error occurred: {e}", "error")
 
@@ -362,6 +410,7 @@ def delete_project(project_id):
 
 @app.route("/project/<int:project_id>")
 @login_required
+@revalidate
 def project(project_id):
     """
     Display details of a specific project and its linked tasks.
@@ -374,20 +423,7 @@ def project(project_id):
         return redirect("/projects")
 
     # Get all tasks linked to the project
-    linked_tasks = {
-        "to_do_tasks": Task.get(
-            session.get("user_id"), project_id=project_id, status="to do"
-        ),
-        "in_progress_tasks": Task.get(
-            session.get("user_id"), project_id=project_id, status="in progress"
-        ),
-        "done_tasks": Task.get(
-            session.get("user_id"), project_id=project_id, status="done"
-        ),
-        "blocked_tasks": Task.get(
-            session.get("user_id"), project_id=project_id, status="blocked"
-        ),
-    }
+    linked_tasks = Task.get_board(session["user_id"], project_id=project_id)
     return render_template(
         "project.html", project=project[0], linked_tasks=linked_tasks
     )
@@ -395,26 +431,45 @@ def project(project_id):
 
 @app.route("/tasks")
 @login_required
+@revalidate
 def tasks():
     """
     Display all tasks for the user, categorized by status.
     """
-    to_do_tasks = Task.get(session.get("user_id"), status="to do")
-    in_progress_tasks = Task.get(session.get("user_id"), status="in progress")
-    done_tasks = Task.get(session.get("user_id"), status="done")
-    blocked_tasks = Task.get(session.get("user_id"), status="blocked")
+    board = Task.get_board(session["user_id"])
+    projects_ = Project.get_all(session["user_id"])
+
+    return render_template("tasks.html", projects=projects_, **board)
+
 
+@app.route("/tasks/more")
+@login_required
+def more_tasks():
+    """
+    Render the next page of a board column for its "Load more" button.
+    Query parameters: status, after (cursor), and optionally project_id and selectable.
+    """
+    status = request.args.get("status", "")
+    project_id = request.args.get("project_id", type=int)
+    try:
+        tasks, next_cursor = Task.get_page(
+            session["user_id"], status, project_id=project_id, after=request.args.get("after")
+        )
+    except ValueError as e:
+        return str(e), 400
     return render_template(
-        "tasks.html",
-        to_do_tasks=to_do_tasks,
-        in_progress_tasks=in_progress_tasks,
-        done_tasks=done_tasks,
-        blocked_tasks=blocked_tasks,
+        "task_cards.html",
+        tasks=tasks,
+        status=status,
+        next_cursor=next_cursor,
+        project_id=project_id,
+        selectable=bool(request.args.get("selectable")),
     )
 
 
 @app.route("/task/<int:task_id>")
 @login_required
+@revalidate
 def task(task_id):
     """
     Display details of a specific task.
@@ -457,7 +512,7 @@ def add_task():
         if deadline:
             deadline = datetime.strptime(
                 request.form.get("deadline"), "%Y-%m-%dT%H:%M"
-            ).strftime("%Y-%m-%d %I:%M:%S %p")
+            ).strftime(Task.DATE_FORMAT)
         # Validate form data
         if not title:
             flash("Task title is required.", "error")
@@ -520,7 +575,7 @@ def edit_task(task_id):
         try:
             if deadline:
                 deadline = datetime.strptime(deadline, "%Y-%m-%dT%H:%M").strftime(
-                    "%Y-%m-%d %I:%M:%S %p"
+                    Task.DATE_FORMAT
                 )
             # Update a task using the Task model
             Task.update(
@@ -584,30 +639,312 @@ def update_task_status(task_id, status):
     return redirect(request.referrer or "/tasks")
 
 
+@app.route("/tasks/bulk", methods=["POST"])
+@login_required
+def bulk_tasks():
+    """
+    Apply one operation (status, priority, project or delete) to many tasks at once.
+    Accepts a JSON body {"task_ids": [...], "operation": ..., "value": ...} or the same fields
+    from a form (where the project of a move comes from its own project_id select), and answers
+    in the same format.
+    """
+    data = request.get_json(silent=True)
+    if data is not None and not isinstance(data, dict):
+        return jsonify({"error": "The body must be a JSON object"}), 400
+
+    try:
+        if data is not None:
+            task_ids = data.get("task_ids", [])
+            operation = data.get("operation")
+            value = data.get("value")
+        else:
+            task_ids = request.form.getlist("task_ids")
+            if not all(task_id.isdigit() for task_id in task_ids):
+                raise ValueError("task_ids must be a list of integers")
+            task_ids = [int(task_id) for task_id in task_ids]
+            operation = request.form.get("operation")
+            value = request.form.get("project_id" if operation == "project" else "value")
+        changed = Task.bulk_update(session["user_id"], task_ids, operation, value)
+    except ValueError as e:
+        if data is not None:
+            return jsonify({"error": str(e)}), 400
+        flash(str(e), "error")
+        return redirect(request.referrer or "/tasks")
+
+    if data is not None:
+        return jsonify({"changed": changed})
+    flash(f"{changed} task(s) updated successfully!", "success")
+    return redirect(request.referrer or "/tasks")
+
+
+@app.route("/import", methods=["GET", "POST"])
+@login_required
+def import_data():
+    """
+    Import tasks or projects from an uploaded CSV or NDJSON file.
+    """
+    if request.method == "POST":
+        file = request.files.get("file")
+        kind = request.form.get("kind", "tasks")
+        if not file or not file.filename:
+            flash("Please choose a file to import.", "error")
+            return render_template("import.html")
+
+        fmt = request.form.get("format") or format_for(file.filename)
+        try:
+            report = import_rows(session["user_id"], file.stream, fmt, kind)
+        except ValueError as e:
+            flash(f"An error occurred: {e}", "error")
+            return render_template("import.html")
+
+        flash(
+            f"{report['imported']} {kind} imported, {report['failed']} row(s) skipped.",
+            "success" if not report["failed"] else "warning",
+        )
+        return render_template("import.html", report=report)
+
+    return render_template("import.html")
+
+
+@app.route("/export/<kind>.<fmt>")
+@login_required
+def export_data(kind, fmt):
+    """
+    Stream the user's tasks or projects as a CSV or NDJSON download.
+    Optional filters: status, project_id, and start/end dates on date_field (deadline by default).
+    """
+    try:
+        chunks = export_rows(
+            session["user_id"],
+            fmt=fmt,
+            kind=kind,
+            status=request.args.get("status") or None,
+            project_id=request.args.get("project_id", type=int),
+            start=request.args.get("start") or None,
+            end=request.args.get("end") or None,
+            date_field=request.args.get("date_field", "deadline"),
+        )
+    except ValueError as e:
+        flash(f"An error occurred: {e}", "error")
+        return redirect(request.referrer or "/tasks")
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={kind}.{fmt}"},
+    )
+
+
+@app.cli.command("import-data")
+@click.argument("username")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--kind", type=click.Choice(["tasks", "projects"]), default="tasks")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default=None)
+def import_data_command(username, path, kind, fmt):
+    """
+    Import tasks or projects for USERNAME from a CSV or NDJSON file.
+    """
+    rows = User.get_by_username(username)
+    if not rows:
+        raise click.ClickException(f"Unknown user: {username}")
+
+    with open(path, encoding="utf-8-sig", newline="") as file:
+        report = import_rows(rows[0]["id"], file, fmt or format_for(path), kind)
+
+    click.echo(f"{report['imported']} {kind} imported, {report['failed']} row(s) skipped.")
+    for error in report["errors"]:
+        click.echo(f"  line {error['line']}: {error['error']}", err=True)
+
+
+@app.cli.command("create-api-token")
+@click.argument("username")
+@click.argument("name")
+def create_api_token_command(username, name):
+    """
+    Create an API token named NAME for USERNAME and print it (it is only shown once).
+    """
+    rows = User.get_by_username(username)
+    if not rows:
+        raise click.ClickException(f"Unknown user: {username}")
+    click.echo(ApiToken.create(rows[0]["id"], name))
+
+
+@app.cli.command("revoke-api-tokens")
+@click.argument("username")
+@click.option("--name", default=None, help="Only revoke the token with this name.")
+def revoke_api_tokens_command(username, name):
+    """
+    Revoke the API tokens of USERNAME.
+    """
+    rows = User.get_by_username(username)
+    if not rows:
+        raise click.ClickException(f"Unknown user: {username}")
+    click.echo(f"{ApiToken.revoke(rows[0]['id'], name)} token(s) revoked.")
+
+
+@app.cli.command("purge-sessions")
+@click.option("--batch-size", type=int, default=None, help="Sessions deleted per transaction.")
+def purge_sessions_command(batch_size):
+    """
+    Delete every expired session (the app also does it in small batches as it runs).
+    """
+    click.echo(f"{app.extensions['sessions'].purge(batch_size)} expired session(s) deleted.")
+
+
+@app.cli.command("serve")
+@click.option("--bind", default=None, help="Address to listen on (default 127.0.0.1:8000, or SERVER_BIND).")
+@click.option("--workers", type=int, default=None, help="Worker processes (default 2 x CPUs + 1).")
+@click.option("--threads", type=int, default=None, help="Request threads per worker (default 4).")
+@click.option("--keep-alive", "keepalive", type=int, default=None, help="Seconds to keep idle connections open.")
+@click.option("--backlog", type=int, default=None, help="Connections waiting to be accepted.")
+@click.option("--timeout", type=int, default=None, help="Seconds before a silent worker is restarted.")
+@click.option("--graceful-timeout", type=int, default=None, help="Seconds given to requests on restart.")
+@click.option("--max-requests", type=int, default=None, help="Requests before a worker is recycled (0: never).")
+@click.option("--pid", "pidfile", default=None, help="File to write the master's PID to (for restarts).")
+def serve_command(**options):
+    """
+    Run the app under the Gunicorn production server.
+    """
+    from server import Server
+
+    Server(app, **options).run()
+
+
+@app.route("/search")
+@login_required
+def search():
+    """
+    Search the user's tasks and projects; results are ranked, highlighted and paginated.
+    """
+    query = request.args.get("q", "").strip()
+    page = request.args.get("page", 1, type=int)
+    found = search_index(session["user_id"], query, page=page)
+    return render_template("search.html", query=query, **found)
+
+
+@app.cli.command("rebuild-search")
+def rebuild_search_command():
+    """
+    Rebuild the full-text search index from the tasks and projects tables.
+    """
+    with db.transaction() as connection:
+        rebuild_index(connection)
+    count = db.execute("SELECT COUNT(*) AS count FROM search_index")[0]["count"]
+    click.echo(f"Search index rebuilt: {count} rows indexed.")
+
+
 @app.route("/calendar")
 @login_required
 def calendar():
     """
-    Display the calendar view for tasks with status 'to do' or 'in progress' and their deadlines.
+    Display the calendar view of task deadlines; events are loaded from calendar_events.
     """
-    user_id = session["user_id"]
+    return render_template("calendar.html", feed_enabled=User.has_calendar_feed(session["user_id"]))
+
+
+@app.route("/calendar/feed", methods=["POST"])
+@login_required
+def new_calendar_feed():
+    """
+    Create the user's calendar feed URL, revoking the previous one, and show it once: only a digest
+    of its token is stored.
+    """
+    token = User.reset_calendar_token(session["user_id"])
+    feed_url = url_for("calendar_feed", token=token, _external=True)
+    return render_template("calendar.html", feed_enabled=True, feed_url=feed_url)
+
 
-    # Get tasks with 'to do' or 'in progress' status
-    tasks = Task.get(user_id, status="to do") + Task.get(user_id, status="in progress")
-
-    # Format tasks for FullCalendar.js
-    events = []
-    for task in tasks:
-        if task.get("deadline"):
-            events.append({
-                "id": task["id"],
-                "title": task["title"],
-                "start": task["deadline"].isoformat(),  # Convert datetime to ISO format. Use deadline as event date
-                "description": task.get("description", ""),
-                "status": task["status"],
-            })
-
-    return render_template("calendar.html", events=events)
+@app.route("/calendar/feed/<token>.ics")
+def calendar_feed(token):
+    """
+    iCalendar subscription feed of the deadlines of the user owning the token (no login: calendar
+    clients authenticate with the secret URL).
+    Clients revalidate with If-None-Match/If-Modified-Since; an unchanged feed is answered with
+    304 from the user's data version alone, without querying tasks.
+    """
+    rows = User.get_by_calendar_token(token)
+    if not rows:
+        return "Unknown calendar feed.", 404
+    user_id = rows[0]["id"]
+
+    today = date.today()
+    version, changed_at = get_change(user_id)
+    etag, last_modified = feed_validators(user_id, version, changed_at, today)
+    headers = {
+        "ETag": f'"{etag}"',
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": "private, no-cache",
+    }
+
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110, 13.2.2)
+    if request.if_none_match:
+        # Weak comparison: compression turns the ETag into a weak one (RFC 9110, 13.1.2)
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = bool(request.if_modified_since and request.if_modified_since >= last_modified)
+    if not_modified:
+        return Response(status=304, headers=headers)
+
+    start, end = feed_window(today)
+    return Response(
+        stream_with_context(generate_ics(user_id, start, end, last_modified, request.host)),
+        mimetype="text/calendar",
+        headers=headers,
+    )
+
+
+@app.route("/calendar/events")
+@login_required
+def calendar_events():
+    """
+    JSON event feed for FullCalendar: the deadlines of 'to do' and 'in progress' tasks between
+    the `start` and `end` query parameters (ISO-8601, as sent by FullCalendar for the visible range).
+    """
+    try:
+        start = datetime.fromisoformat(request.args["start"])
+        end = datetime.fromisoformat(request.args["end"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "start and end must be ISO-8601 dates"}), 400
+    if end <= start or end - start > timedelta(days=Task.CALENDAR_MAX_DAYS):
+        return jsonify({"error": f"The range must cover 1 to {Task.CALENDAR_MAX_DAYS} days"}), 400
+
+    # Deadlines are stored in local time without an offset, so compare with the range's wall-clock times
+    tasks = Task.get_deadlines(
+        session["user_id"], start.replace(tzinfo=None), end.replace(tzinfo=None)
+    )
+    events = [
+        {
+            "id": task["id"],
+            "title": task["title"],
+            "start": task["deadline"],
+            "description": task["description"],
+            "status": task["status"],
+        }
+        for task in tasks
+    ]
+    return jsonify(events)
+
+
+@app.route("/stats")
+def stats():
+    """
+    Report the counters of the process serving the request as JSON: sessions, password hashing,
+    login throttle and query cache. Each server worker keeps its own counters.
+    Requires the header `Authorization: Bearer <STATS_TOKEN>`.
+    """
+    expected = f"Bearer {STATS_TOKEN}".encode()
+    if not STATS_TOKEN or not hmac.compare_digest(request.headers.get("Authorization", "").encode(), expected):
+        return jsonify({"error": "Not found"}), 404
+    return jsonify(
+        {
+            "pid": os.getpid(),
+            "sessions": app.extensions["sessions"].stats(),
+            "password_hasher": password_hasher.stats(),
+            "login_throttle": login_throttle.stats(),
+            "query_cache": query_cache.stats(),
+        }
+    )
 
 
 if __name__ == "__main__":
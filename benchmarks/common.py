@@ -0,0 +1,69 @@
+"""
+Fixture shared by the benchmarks: a user with generated projects and tasks, and logged-in clients.
+
+Import it before the app: it puts the repository on sys.path. The models are only imported when
+populate() runs, so DATABASE_PATH can point to a throwaway database first.
+"""
+import http.client
+import os
+import sys
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+USERNAME = "bench"
+EMAIL = "bench@example.com"
+PASSWORD = "benchmark-password"
+
+
+def populate(task_count=0, project_count=1):
+    """
+    Creates the tables and user 1 (USERNAME, with PASSWORD), owning project_count projects in
+    progress and task_count tasks: statuses in turn, deadlines spread over January 2030, and every
+    other task in a project. Closes the connections afterwards so that forked servers start clean.
+    """
+    from models import Project, Task, User, db, init_db
+
+    init_db()
+    User.create(USERNAME, EMAIL, PASSWORD)
+    for i in range(project_count):
+        Project.create(f"Project {i}", "Generated", 1, status="in progress")
+    statuses = Task.VALID_STATUSES
+    with db.transaction():
+        for i in range(task_count):
+            Task.create(
+                f"Task {i}: prepare the quarterly report",
+                "Collect the figures and review them with the team",
+                1,
+                project_id=i % project_count + 1 if project_count and i % 2 else None,
+                status=statuses[i % len(statuses)],
+                deadline=f"2030-01-{i % 28 + 1:02d}T10:00",
+            )
+    db.execute("ANALYZE")
+    db.close_all()
+
+
+def session_client(app):
+    """
+    Returns a Flask test client logged in as the populated user, without hashing its password.
+    """
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = 1
+        session["user_name"] = USERNAME
+        session["user_email"] = EMAIL
+    return client
+
+
+def login_cookie(host, port):
+    """
+    Logs in to a running server over HTTP and returns the session cookie ("name=value").
+    """
+    connection = http.client.HTTPConnection(host, port)
+    body = urllib.parse.urlencode({"username": USERNAME, "password": PASSWORD})
+    connection.request("POST", "/login", body, {"Content-Type": "application/x-www-form-urlencoded"})
+    response = connection.getresponse()
+    response.read()
+    assert response.status == 302, response.status
+    return response.getheader("Set-Cookie").split(";", 1)[0]
@@ -0,0 +1,83 @@
+"""
+Benchmarks response compression: bytes sent and CPU time per response for each encoding.
+
+Builds a throwaway database with one user owning --tasks tasks, then requests a few pages, JSON and
+streamed responses through the Flask test client with no Accept-Encoding, gzip and brotli.
+CPU is the process time of the whole request (median of --repeat); "compress" is the part of it
+spent compressing, measured on the uncompressed body with the same settings.
+
+    python benchmarks/compression_benchmark.py --tasks 2000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from common import populate, session_client
+
+ENDPOINTS = (
+    "/tasks",
+    "/project/1",
+    "/calendar/events?start=2030-01-01&end=2030-02-01",
+    "/export/tasks.csv",
+)
+ENCODINGS = ("identity", "gzip", "br")
+
+
+def measure(client, path, encoding, repeat):
+    sizes, timings = [], []
+    for _ in range(repeat):
+        started = time.process_time()
+        response = client.get(path, headers={"Accept-Encoding": encoding})
+        data = response.get_data()
+        timings.append(time.process_time() - started)
+        sizes.append(len(data))
+        assert response.status_code == 200, (path, response.status_code)
+        assert response.headers.get("Content-Encoding", "identity") == encoding or len(data) < 500
+    return statistics.median(sizes), statistics.median(timings) * 1000, data
+
+
+def compress_time(compression, encoding, body, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        compress, _, finish = compression._compressor(encoding)
+        compress(body) + finish()
+        timings.append(time.process_time() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)  # Session files and the database go to the temporary directory
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "benchmark.db")
+        from app import app
+        import compression
+
+        populate(args.tasks)
+        extension = app.extensions["compress"]
+        encodings = ENCODINGS if compression.brotli is not None else ENCODINGS[:2]
+
+        client = session_client(app)
+
+        print(f"{args.tasks:,} tasks; gzip level {app.config['COMPRESS_LEVEL']}, "
+              f"brotli quality {app.config['COMPRESS_BROTLI_QUALITY']}; median of {args.repeat}\n")
+        print(f"{'endpoint':<52}{'encoding':<10}{'bytes':>10}{'ratio':>8}{'CPU ms':>9}{'compress ms':>13}")
+        for path in ENDPOINTS:
+            identity_size, _, body = measure(client, path, "identity", args.repeat)
+            for encoding in encodings:
+                size, cpu, _ = measure(client, path, encoding, args.repeat)
+                overhead = (
+                    compress_time(extension, encoding, body, args.repeat) if encoding != "identity" else 0.0
+                )
+                print(f"{path:<52}{encoding:<10}{size:>10,}{identity_size / size:>8.1f}{cpu:>9.2f}{overhead:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
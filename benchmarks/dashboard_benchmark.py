@@ -0,0 +1,89 @@
+"""
+Benchmarks the dashboard with its queries run one after another and concurrently (async view).
+
+Builds a throwaway database where one user owns --tasks tasks over --projects projects, disables the
+query cache so every request runs its queries, and registers a copy of the dashboard view that
+runs them sequentially. Both are requested through the Flask test client from 1 and --clients
+threads; reports requests per second and latency percentiles.
+
+    python benchmarks/dashboard_benchmark.py --tasks 50000 --clients 8
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import populate, session_client
+
+
+def add_sequential_view(app):
+    from flask import render_template, session
+
+    from models import Project, Task
+
+    def dashboard_sequential():
+        user_id = session["user_id"]
+        active_projects = Project.get_active_projects(user_id)
+        stats = Task.get_dashboard_stats(user_id)
+        task_lists = Task.get_dashboard_lists(user_id)
+        return render_template(
+            "index.html",
+            active_projects=active_projects,
+            stats=stats,
+            ongoing_tasks=task_lists["on_hold"],
+            completed_this_week=stats["completed_this_week_percent"],
+            upcoming_tasks=task_lists["upcoming"],
+            in_progress_task=task_lists["in_progress"],
+        )
+
+    app.add_url_rule("/bench/sequential", view_func=dashboard_sequential)
+
+
+def load(app, path, clients, requests):
+    sessions = [session_client(app) for _ in range(clients)]
+
+    def run(index):
+        client = sessions[index % clients]
+        started = time.perf_counter()
+        response = client.get(path)
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        timings = sorted(t * 1000 for t in executor.map(run, range(requests)))
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "benchmark.db")
+        os.environ["QUERY_CACHE_TTL"] = "0"  # Every request runs its queries
+        from app import app
+
+        populate(args.tasks, args.projects)
+        add_sequential_view(app)
+
+        print(f"{args.tasks:,} tasks, {args.projects} projects, query cache off, "
+              f"{args.requests} requests, {os.cpu_count()} CPU(s)\n")
+        print(f"{'dashboard':<14}{'clients':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}")
+        for clients in (1, args.clients):
+            for label, path in (("sequential", "/bench/sequential"), ("concurrent", "/")):
+                load(app, path, clients, 10)  # Warm up connections and threads
+                rate, p50, p95 = load(app, path, clients, args.requests)
+                print(f"{label:<14}{clients:>8}{rate:>9.1f}{p50:>9.1f}{p95:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
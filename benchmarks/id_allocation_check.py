@@ -0,0 +1,82 @@
+"""
+Checks that per-user task IDs stay unique when tasks are created concurrently.
+
+Builds a throwaway database with one user, then --threads threads and --processes processes (each
+with its own connections) create --tasks tasks each for that user at the same time. Fails if any
+create raised (IntegrityError, database locked, ...) or if the returned or stored IDs are not
+exactly 1 to the number of tasks created.
+
+    python benchmarks/id_allocation_check.py --threads 8 --tasks 200 --processes 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from common import populate
+
+
+def create_tasks(task_count, start):
+    """
+    Creates task_count tasks for user 1 once `start` (a time.time() value) is reached, so that all
+    workers begin together. Returns (IDs, errors).
+    """
+    from models import Task, db
+
+    time.sleep(max(0.0, start - time.time()))
+    ids, errors = [], []
+    for i in range(task_count):
+        try:
+            ids.append(Task.create(f"Task {threading.get_ident()}-{i}", "Generated", 1))
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+    db.release()
+    return ids, errors
+
+
+def run(threads, processes, task_count):
+    """
+    Runs create_tasks in every thread and process at once; returns all (IDs, errors).
+    """
+    start = time.time() + 1  # Leaves time for the processes to start
+    with ThreadPoolExecutor(max_workers=threads) as thread_pool, \
+            ProcessPoolExecutor(max_workers=max(processes, 1)) as process_pool:
+        futures = [thread_pool.submit(create_tasks, task_count, start) for _ in range(threads)]
+        futures += [process_pool.submit(create_tasks, task_count, start) for _ in range(processes)]
+        results = [future.result() for future in futures]
+    return [i for ids, _ in results for i in ids], [e for _, errors in results for e in errors]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=0)
+    parser.add_argument("--tasks", type=int, default=200, help="tasks created by each thread or process")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "check.db")
+        from models import db
+
+        populate(project_count=0)  # Closes the connections: the processes open their own
+        ids, errors = run(args.threads, args.processes, args.tasks)
+
+        expected = (args.threads + args.processes) * args.tasks
+        stored = db.execute("SELECT COUNT(*) AS total, COUNT(DISTINCT id) AS distinct_ids, MAX(id) AS last_id FROM tasks")[0]
+        db.close_all()
+
+    print(f"{args.threads} threads and {args.processes} processes x {args.tasks} tasks: "
+          f"{len(ids)} IDs returned, {len(set(ids))} distinct; {stored['total']} rows stored, "
+          f"{stored['distinct_ids']} distinct, last ID {stored['last_id']}; {len(errors)} errors")
+    for error in sorted(set(errors))[:10]:
+        print(f"  {error}", file=sys.stderr)
+    if errors or not (len(ids) == len(set(ids)) == stored["total"] == stored["distinct_ids"] == stored["last_id"] == expected):
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmarks password hashing in the request thread against the hashing process pool.
+
+Builds a throwaway database with one user, then serves a burst of --logins logins mixed with
+--pages dashboard requests from --threads request threads (like a threaded server), through the
+Flask test client. Reports logins per second and the latency of the dashboard requests, first
+with hashing inline (PASSWORD_HASH_WORKERS=0) and then with --workers hashing processes.
+
+    python benchmarks/password_benchmark.py --logins 64 --pages 256 --threads 8
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import PASSWORD, USERNAME, populate, session_client
+
+
+def login(app):
+    client = app.test_client()
+    started = time.perf_counter()
+    response = client.post("/login", data={"username": USERNAME, "password": PASSWORD})
+    assert response.status_code in (302, 503), response.status_code
+    return "login", response.status_code, time.perf_counter() - started
+
+
+def dashboard(app):
+    client = session_client(app)
+    started = time.perf_counter()
+    response = client.get("/")
+    assert response.status_code == 200, response.status_code
+    return "page", response.status_code, time.perf_counter() - started
+
+
+def run(app, hasher, workers, args):
+    hasher.workers = workers
+    hasher.shutdown()
+    # Start the pool before timing, as a running server would have
+    hasher.hash("warm-up")
+
+    # Spread the page views between the logins
+    jobs, pages = [], args.pages
+    per_login = max(args.pages // max(args.logins, 1), 1)
+    for _ in range(args.logins):
+        count = min(per_login, pages)
+        jobs += [login] + [dashboard] * count
+        pages -= count
+    jobs += [dashboard] * pages
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = list(executor.map(lambda job: job(app), jobs))
+    elapsed = time.perf_counter() - started
+
+    logins = [result for result in results if result[0] == "login"]
+    pages = sorted(result[2] * 1000 for result in results if result[0] == "page")
+    return {
+        "logins/s": sum(1 for result in logins if result[1] == 302) / elapsed,
+        "refused": sum(1 for result in logins if result[1] == 503),
+        "page p50 ms": statistics.median(pages),
+        "page p95 ms": pages[int(len(pages) * 0.95) - 1],
+        "total s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--pages", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "benchmark.db")
+        # Queue every login: this measures throughput, not refusals
+        os.environ.setdefault("PASSWORD_HASH_WAIT", "600")
+        # Every login is for the same user from the same address: don't throttle them
+        os.environ.setdefault("LOGIN_THROTTLE_USERNAME_BURST", "1000000")
+        os.environ.setdefault("LOGIN_THROTTLE_ADDRESS_BURST", "1000000")
+        from app import app
+        from models.passwords import password_hasher
+
+        populate(project_count=0)
+        print(f"{password_hasher.method}; {args.logins} logins and {args.pages} dashboard requests "
+              f"from {args.threads} threads on {os.cpu_count()} CPU(s)\n")
+        print(f"{'hashing':<22}{'logins/s':>10}{'refused':>9}{'page p50 ms':>13}{'page p95 ms':>13}{'total s':>9}")
+        for label, workers in (("inline", 0), (f"pool ({args.workers} processes)", args.workers)):
+            result = run(app, password_hasher, workers, args)
+            print(f"{label:<22}{result['logins/s']:>10.1f}{result['refused']:>9}"
+                  f"{result['page p50 ms']:>13.1f}{result['page p95 ms']:>13.1f}{result['total s']:>9.1f}")
+        password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
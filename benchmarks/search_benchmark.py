@@ -0,0 +1,129 @@
+"""
+Benchmarks full-text search against the LIKE scan it replaces.
+
+Builds a throwaway database with --tasks tasks spread over --users users (the search index is filled
+by the triggers while inserting), then times models.search.search() and an equivalent
+LIKE '%term%' query for a few terms, and a full `rebuild-search`.
+
+    python benchmarks/search_benchmark.py --tasks 1000000 --users 10
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import db, init_db  # noqa: E402
+from models.search import rebuild_index, search  # noqa: E402
+
+# Synthetic vocabulary with Zipf-distributed word frequencies, like natural text
+VOCABULARY_SIZE = 20000
+# Frequent, average and rare terms, a two-word query, and a prefix as typed in the search box
+TERMS = ("report", "budget", "zyzzyva", "report budget", "dashb")
+
+
+def vocabulary(rng):
+    words = ["report", "budget", "dashboard"] + [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 10)))
+        for _ in range(VOCABULARY_SIZE - 3)
+    ]
+    # Put the named terms at ranks 1, 60 and 400 of the frequency distribution
+    words[1], words[59] = words[59], words[1]
+    words[2], words[399] = words[399], words[2]
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    return words, weights
+
+
+def sentence(rng, words, weights, length):
+    return " ".join(rng.choices(words, cum_weights=weights, k=length))
+
+
+def populate(task_count, user_count, batch_size=20000):
+    rng = random.Random(42)
+    words, weights = vocabulary(rng)
+    db.executemany(
+        "INSERT INTO users (id, username, hash, email) VALUES (?, ?, 'x', ?)",
+        [(user_id, f"user{user_id}", f"user{user_id}@example.com") for user_id in range(1, user_count + 1)],
+    )
+    next_ids = dict.fromkeys(range(1, user_count + 1), 0)
+    started = time.perf_counter()
+    for offset in range(0, task_count, batch_size):
+        rows = []
+        for _ in range(min(batch_size, task_count - offset)):
+            user_id = rng.randint(1, user_count)
+            next_ids[user_id] += 1
+            rows.append((
+                next_ids[user_id],
+                user_id,
+                sentence(rng, words, weights, 4),
+                sentence(rng, words, weights, 10),
+                sentence(rng, words, weights, 20),
+            ))
+        # One rare word, to time selective queries
+        if offset == 0:
+            rows[0] = rows[0][:2] + ("zyzzyva " + rows[0][2],) + rows[0][3:]
+        with db.transaction():
+            db.executemany(
+                "INSERT INTO tasks (id, user_id, title, description, detailed_description) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+    return time.perf_counter() - started
+
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def like_search(user_id, text):
+    conditions, values = [], [user_id]
+    for word in text.split():
+        conditions.append("(title LIKE ? OR description LIKE ? OR detailed_description LIKE ?)")
+        values += [f"%{word}%"] * 3
+    return db.execute(
+        f"SELECT id, title FROM tasks WHERE user_id = ? AND {' AND '.join(conditions)} LIMIT 21",
+        *values,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db.configure(path=os.path.join(directory, "benchmark.db"))
+        init_db()
+
+        elapsed = populate(args.tasks, args.users)
+        print(f"Inserted {args.tasks:,} tasks with index triggers in {elapsed:.1f} s "
+              f"({args.tasks / elapsed:,.0f} rows/s)")
+
+        user_id = 1
+        print(f"\nQueries for one user (~{args.tasks // args.users:,} tasks), median of {args.repeat}, first page:")
+        print(f"{'terms':<16}{'FTS5 ms':>10}{'LIKE ms':>10}")
+        for terms in TERMS:
+            fts = timed(lambda: search(user_id, terms), args.repeat)
+            like = timed(lambda: like_search(user_id, terms), args.repeat)
+            print(f"{terms:<16}{fts:>10.1f}{like:>10.1f}")
+
+        started = time.perf_counter()
+        with db.transaction() as connection:
+            rebuild_index(connection)
+        print(f"\nrebuild-search: {time.perf_counter() - started:.1f} s")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
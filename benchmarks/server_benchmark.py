@@ -0,0 +1,129 @@
+"""
+Benchmarks the production server (`flask serve`) against the Werkzeug development server.
+
+Builds a throwaway database with one user owning --tasks tasks, starts each server in turn on a
+local port, logs in, then requests the dashboard and the tasks page from --clients threads for
+--duration seconds (keeping connections alive where the server allows it). Reports requests per
+second and latency percentiles.
+
+    python benchmarks/server_benchmark.py --clients 16 --duration 20 --workers 3 --threads 4
+"""
+import argparse
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import ROOT, login_cookie, populate
+
+PORT = 8765
+PATHS = ("/", "/tasks")
+
+
+def wait_until_up(process):
+    for _ in range(100):
+        if process.poll() is not None:
+            raise RuntimeError("The server exited")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", PORT, timeout=1)
+            connection.request("GET", "/login")
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("The server did not start")
+
+
+def load(clients, duration, cookie):
+    timings, errors = [], []
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        # http.client reopens the connection when the server closed it
+        connection = http.client.HTTPConnection("127.0.0.1", PORT, timeout=30)
+        count = index
+        while time.perf_counter() < deadline:
+            path = PATHS[count % len(PATHS)]
+            count += 1
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path, headers={"Cookie": cookie})
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+                    continue
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(type(e).__name__)
+                connection.close()
+                continue
+            timings.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    timings = sorted(t * 1000 for t in timings)
+    return {
+        "req/s": len(timings) / elapsed,
+        "p50": statistics.median(timings),
+        "p95": timings[int(len(timings) * 0.95) - 1],
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=2 * (os.cpu_count() or 1) + 1)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "benchmark.db")
+        populate(args.tasks)
+        environment = dict(os.environ, FLASK_APP=os.path.join(ROOT, "app.py"))
+
+        servers = (
+            ("dev server (threaded)", [
+                sys.executable, "-c",
+                f"import sys; sys.path.insert(0, {ROOT!r}); from app import app; app.run(port={PORT}, threaded=True)",
+            ]),
+            (f"serve {args.workers}x{args.threads}", [
+                sys.executable, "-m", "flask", "serve", "--bind", f"127.0.0.1:{PORT}",
+                "--workers", str(args.workers), "--threads", str(args.threads),
+            ]),
+        )
+
+        print(f"{args.tasks} tasks; {args.clients} clients for {args.duration:.0f} s on {os.cpu_count()} CPU(s); "
+              f"pages: {', '.join(PATHS)}\n")
+        print(f"{'server':<24}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+        for label, command in servers:
+            log = open(os.path.join(directory, "server.log"), "w+")
+            process = subprocess.Popen(command, cwd=directory, env=environment, stdout=log, stderr=subprocess.STDOUT)
+            try:
+                wait_until_up(process)
+                result = load(args.clients, args.duration, login_cookie("127.0.0.1", PORT))
+            except RuntimeError:
+                log.seek(0)
+                print(log.read()[-2000:], file=sys.stderr)
+                raise
+            finally:
+                process.terminate()
+                process.wait()
+                log.close()
+            print(f"{label:<24}{result['req/s']:>9.1f}{result['p50']:>9.1f}{result['p95']:>9.1f}{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional: gzip is always available
+    brotli = None
+
+# Content types worth compressing (text formats produced by the app)
+COMPRESSIBLE_MIMETYPES = frozenset(
+    (
+        "text/html",
+        "text/css",
+        "text/csv",
+        "text/plain",
+        "text/calendar",
+        "application/json",
+        "application/javascript",
+        "application/x-ndjson",
+    )
+)
+
+
+class Compress:
+    """
+    Compresses responses with brotli or gzip, as negotiated with the client's Accept-Encoding.
+    Buffered responses smaller than COMPRESS_MIN_SIZE bytes are sent as they are; streamed responses
+    (exports, feeds) are compressed chunk by chunk as they are generated. Responses that already have
+    a Content-Encoding, files sent as-is and non-text content types are skipped.
+
+    Settings (app.config, defaulting to the environment variables of the same name):
+    COMPRESS_MIN_SIZE, COMPRESS_LEVEL (gzip, 1-9) and COMPRESS_BROTLI_QUALITY (0-11).
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESS_MIN_SIZE", int(os.environ.get("COMPRESS_MIN_SIZE", 500)))
+        app.config.setdefault("COMPRESS_LEVEL", int(os.environ.get("COMPRESS_LEVEL", 6)))
+        app.config.setdefault(
+            "COMPRESS_BROTLI_QUALITY", int(os.environ.get("COMPRESS_BROTLI_QUALITY", 4))
+        )
+        self.config = app.config
+        app.extensions["compress"] = self
+        app.after_request(self.compress)
+
+    def _encoding(self):
+        """
+        Returns the best encoding accepted by the client ('br' or 'gzip'), or None.
+        """
+        offers = ["br", "gzip"] if brotli is not None else ["gzip"]
+        return request.accept_encodings.best_match(offers)
+
+    def _compressor(self, encoding):
+        """
+        Returns (compress, flush, finish) functions of a new stream compressor.
+        """
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.config["COMPRESS_BROTLI_QUALITY"])
+            return compressor.process, compressor.flush, compressor.finish
+        # wbits=31: zlib stream with a gzip header and trailer
+        compressor = zlib.compressobj(self.config["COMPRESS_LEVEL"], zlib.DEFLATED, 31)
+        return (
+            compressor.compress,
+            lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+            lambda: compressor.flush(zlib.Z_FINISH),
+        )
+
+    def _stream(self, chunks, encoding):
+        """
+        Compresses a streamed body, flushing after every chunk so each one reaches the client
+        as soon as it is generated.
+        """
+        compress, flush, finish = self._compressor(encoding)
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                data = compress(chunk) + flush()
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def compress(self, response):
+        """
+        after_request hook compressing the response if the client and the content allow it.
+        """
+        if (
+            request.method == "HEAD"
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or "Content-Encoding" in response.headers
+            or response.direct_passthrough
+        ):
+            return response
+
+        # The body depends on Accept-Encoding even when it is sent uncompressed
+        response.vary.add("Accept-Encoding")
+        encoding = self._encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._stream(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < self.config["COMPRESS_MIN_SIZE"]:
+                return response
+            compress, _, finish = self._compressor(encoding)
+            response.set_data(compress(data) + finish())
+
+        response.headers["Content-Encoding"] = encoding
+        # A strong ETag identifies exact bytes; the compressed body is only equivalent to them
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -1,6 +1,28 @@
-from flask import redirect, session
+import os
+from datetime import datetime
+from flask import current_app, make_response, redirect, request, session
 from functools import wraps
 
+from models.cache import get_version
+
+
+def _deployed_version():
+    """
+    Returns a tag of the deployed templates and static files (their latest modification time),
+    so that pages cached by browsers are not reused after an update.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    latest = 0
+    for folder in ("templates", "static"):
+        for path, _, files in os.walk(os.path.join(root, folder)):
+            for name in files:
+                latest = max(latest, os.path.getmtime(os.path.join(path, name)))
+    return f"{int(latest):x}"
+
+
+# Part of every page ETag; set APP_VERSION to the release to skip scanning the files at startup
+PAGES_VERSION = os.environ.get("APP_VERSION") or _deployed_version()
+
 
 def login_required(f):
     """
@@ -13,6 +35,40 @@ def login_required(f):
     def decorated_function(*args, **kwargs):
         if session.get("user_id") is None:
             return redirect("/login")
-        return f(*args, **kwargs)
+        # ensure_sync also runs async views
+        return current_app.ensure_sync(f)(*args, **kwargs)
+
+    return decorated_function
+
+
+def revalidate(f):
+    """
+    Decorate GET routes whose page only depends on the logged-in user's data so browsers can reuse it.
+    The page gets a weak ETag built from the user's data version (bumped by every task, project or
+    profile write) and the current hour, for the date-dependent parts of the pages. A request whose
+    If-None-Match matches is answered with 304 before the route runs any query.
+    Use below login_required.
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # Pending flash messages must be shown once, by a freshly rendered page
+        if session.get("_flashes"):
+            return current_app.ensure_sync(f)(*args, **kwargs)
+
+        user_id = session["user_id"]
+        etag = f"{user_id}-{get_version(user_id)}-{datetime.now():%Y%m%d%H}-{PAGES_VERSION}"
+        if request.if_none_match.contains_weak(etag):
+            response = make_response("", 304)
+        else:
+            response = make_response(current_app.ensure_sync(f)(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        # Browsers may keep the page but must check it is still current before showing it again
+        response.headers["Cache-Control"] = "private, no-cache"
+        response.vary.add("Cookie")
+        return response
 
     return decorated_function
@@ -1,10 +1,14 @@
 from .database import db
+from .cache import query_cache
 from .user import User
 from .project import Project
 from .task import Task
+from .api_token import ApiToken
+from .migrations import migrate
 
-# Function to initialize tables if dey dont exist.
+# Function to initialize tables if dey dont exist and apply pending schema migrations.
 def init_db():
     User.create_table()
     Project.create_table()
     Task.create_table()
+    migrate()
@@ -0,0 +1,64 @@
+import hashlib
+import secrets
+
+from .database import db
+
+# Prefix of every token, so leaked tokens are easy to recognize
+TOKEN_PREFIX = "ptf_"
+
+
+class ApiToken:
+    """
+    Bearer tokens authenticating the JSON API. Only a SHA-256 digest of each token is stored,
+    so the token itself is shown once, when it is created.
+    """
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @staticmethod
+    def create(user_id, name):
+        """
+        Creates a token for the user and returns it.
+        """
+        if not name:
+            raise ValueError("A token name is required")
+        token = TOKEN_PREFIX + secrets.token_urlsafe(32)
+        db.execute(
+            "INSERT INTO api_tokens (token_hash, user_id, name) VALUES (?, ?, ?)",
+            ApiToken._digest(token),
+            user_id,
+            name,
+        )
+        return token
+
+    @staticmethod
+    def authenticate(token):
+        """
+        Returns the ID of the user owning the token, or None if the token is unknown.
+        """
+        if not token or not token.startswith(TOKEN_PREFIX):
+            return None
+        rows = db.execute(
+            "SELECT user_id FROM api_tokens WHERE token_hash = ?", ApiToken._digest(token)
+        )
+        return rows[0]["user_id"] if rows else None
+
+    @staticmethod
+    def get_all(user_id):
+        """
+        Retrieves the names and creation dates of the user's tokens.
+        """
+        return db.execute(
+            "SELECT name, created_at FROM api_tokens WHERE user_id = ? ORDER BY created_at", user_id
+        )
+
+    @staticmethod
+    def revoke(user_id, name=None):
+        """
+        Deletes the user's token with the given name, or all of them. Returns the number deleted.
+        """
+        if name is None:
+            return db.execute("DELETE FROM api_tokens WHERE user_id = ?", user_id)
+        return db.execute("DELETE FROM api_tokens WHERE user_id = ? AND name = ?", user_id, name)
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from .database import db
+
+# Size bound and time-to-live of the query cache (overridable from the environment)
+CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", 2048))
+CACHE_TTL = float(os.environ.get("QUERY_CACHE_TTL", 60))  # Seconds
+
+
+def get_version(user_id):
+    """
+    Returns the user's data version, which every task or project write increments.
+    """
+    rows = db.execute("SELECT version FROM data_versions WHERE user_id = ?", user_id)
+    return rows[0]["version"] if rows else 0
+
+
+def get_change(user_id):
+    """
+    Returns the user's data version and the UTC datetime of their last write (None if they never wrote).
+    """
+    rows = db.execute("SELECT version, updated_at FROM data_versions WHERE user_id = ?", user_id)
+    if not rows:
+        return 0, None
+    updated_at = rows[0]["updated_at"]
+    if updated_at:
+        updated_at = datetime.fromisoformat(updated_at).replace(tzinfo=timezone.utc)
+    return rows[0]["version"], updated_at
+
+
+def bump_version(user_id):
+    """
+    Increments the user's data version, invalidating their cached queries in every worker process.
+    Call it inside the transaction of the write.
+    """
+    db.execute(
+        """
+        INSERT INTO data_versions (user_id, version, updated_at) VALUES (?, 1, CURRENT_TIMESTAMP)
+        ON CONFLICT (user_id) DO UPDATE SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        """,
+        user_id,
+    )
+
+
+class QueryCache:
+    """
+    In-process LRU cache of model query results, keyed by user and query.
+    Every entry remembers the user's data version when it was loaded; a lookup first reads the
+    current version from the database (a primary-key lookup), so writes made by any process
+    invalidate the entry. Entries also expire after `ttl` seconds, which bounds the staleness
+    of time-dependent results such as the weekly statistics.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(self, user_id, key, load):
+        """
+        Returns the cached result of `key` for the user, calling load() to fill it if needed.
+        """
+        # Inside a transaction the result may include writes that are not committed yet (and may be
+        # rolled back, reusing their version number), so it must not be shared
+        if db.connection().in_transaction:
+            return load()
+
+        # Read the version before loading, so a concurrent write can only make the entry look older
+        version = get_version(user_id)
+        cache_key = (user_id, key)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == version and entry[1] > now:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        value = load()
+
+        with self._lock:
+            self._entries[cache_key] = (version, now + self.ttl, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns the hit, miss and eviction counters of this process.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Shared cache used by the models
+query_cache = QueryCache()
+
+
+def cached(function):
+    """
+    Decorates a model getter that takes a `user_id` argument so its results go through query_cache.
+    Cached results are shared between requests and must not be modified.
+    """
+    position = function.__code__.co_varnames.index("user_id")
+    name = function.__qualname__
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        user_id = kwargs["user_id"] if "user_id" in kwargs else args[position]
+        key = (name, args, tuple(sorted(kwargs.items())))
+        return query_cache.get_or_load(user_id, key, lambda: function(*args, **kwargs))
+
+    return wrapper
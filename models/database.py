@@ -1,13 +1,273 @@
+import asyncio
 import os
-from cs50 import SQL
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache, partial
 
-# Path to the SQLite database file
-db_file = "app.db"
+# Path to the SQLite database file and connection tuning (overridable from the environment)
+DATABASE_PATH = os.environ.get("DATABASE_PATH", "app.db")
+POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", 8))
+CACHE_SIZE = int(os.environ.get("DATABASE_CACHE_SIZE", -16000))  # Negative values are KiB
+MMAP_SIZE = int(os.environ.get("DATABASE_MMAP_SIZE", 128 * 1024 * 1024))
+BUSY_TIMEOUT = int(os.environ.get("DATABASE_BUSY_TIMEOUT", 5000))  # Milliseconds
+STATEMENT_CACHE_SIZE = int(os.environ.get("DATABASE_STATEMENT_CACHE_SIZE", 256))
+# Threads (each with its own read-only connection) running the queries of async views
+READ_POOL_SIZE = int(os.environ.get("DATABASE_READ_POOL_SIZE", 4))
 
-# Check if the database file exists
-if not os.path.exists(db_file):
-    print(f"Database file '{db_file}' does not exist. Creating it...")
-    open(db_file, "w").close()  # Create an empty file
+# Store dates the way cs50.SQL did instead of relying on sqlite3's deprecated default adapters
+sqlite3.register_adapter(datetime, lambda value: value.strftime("%Y-%m-%d %H:%M:%S"))
+sqlite3.register_adapter(date, lambda value: value.strftime("%Y-%m-%d"))
 
-# Initialize the SQL object
-db = SQL("sqlite:///app.db")
\ No newline at end of file
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _is_insert(sql):
+    """
+    Tells whether a statement is an INSERT, whose result is the new row's id.
+    Cached by SQL text so each distinct statement is only inspected once.
+    """
+    return sql.lstrip().split(None, 1)[0].upper() in ("INSERT", "REPLACE")
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _column_positions(names):
+    """
+    Maps each column name of a result to its position, shared by every record of that shape.
+    """
+    return {name: position for position, name in enumerate(names)}
+
+
+class ConnectionManager:
+    """
+    Gives each worker thread its own SQLite connection.
+    Connections run in WAL mode with tuned pragmas, go back to a bounded idle pool when released
+    and are dropped after a fork so that every process opens its own.
+    Async code runs its queries with read() on a separate pool of threads holding read-only
+    connections, so that independent queries of one request run concurrently.
+    """
+
+    def __init__(
+        self,
+        path=DATABASE_PATH,
+        pool_size=POOL_SIZE,
+        cache_size=CACHE_SIZE,
+        mmap_size=MMAP_SIZE,
+        busy_timeout=BUSY_TIMEOUT,
+        read_pool_size=READ_POOL_SIZE,
+    ):
+        self.path = path
+        self.pool_size = pool_size
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.busy_timeout = busy_timeout
+        self.read_pool_size = read_pool_size
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._idle = []
+        self._readers = None
+        self._pid = os.getpid()
+
+    def configure(self, **options):
+        """
+        Changes the path or tuning options and closes every pooled connection so they are reopened with them.
+        """
+        for key, value in options.items():
+            if not hasattr(self, key) or key.startswith("_"):
+                raise ValueError(f"Unknown database option: {key}")
+            setattr(self, key, value)
+        self.close_all()
+
+    def _connect(self, readonly=False):
+        """
+        Opens a new connection and applies the pragmas.
+        """
+        # Check if the database file exists
+        if not os.path.exists(self.path):
+            print(f"Database file '{self.path}' does not exist. Creating it...")
+
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,  # LRU of prepared statements keyed by SQL text
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+        connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        connection.execute("PRAGMA foreign_keys=ON")
+        if readonly:
+            # Any write through a reader connection fails instead of bypassing transaction()
+            connection.execute("PRAGMA query_only=ON")
+        return connection
+
+    def _check_fork(self):
+        """
+        Forgets connections inherited from a parent process.
+        """
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._local = threading.local()
+            self._idle = []
+            self._readers = None
+
+    def connection(self):
+        """
+        Returns the connection of the current thread, taking one from the pool if needed.
+        Reader threads (see read()) keep their own read-only connection instead.
+        """
+        self._check_fork()
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if getattr(self._local, "reader", False):
+                self._local.connection = self._connect(readonly=True)
+                return self._local.connection
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                connection = self._connect()
+            self._local.connection = connection
+        return connection
+
+    def release(self, *_):
+        """
+        Gives the current thread's connection back to the pool, closing it if the pool is full.
+        Registered as a Flask teardown function.
+        """
+        self._check_fork()
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            return
+        self._local.connection = None
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def close_all(self):
+        """
+        Closes the current thread's connection, every idle connection and the reader threads
+        (whose connections close as the threads exit).
+        """
+        self.release()
+        with self._lock:
+            idle, self._idle = self._idle, []
+            readers, self._readers = self._readers, None
+        for connection in idle:
+            connection.close()
+        if readers is not None:
+            readers.shutdown()
+
+    def _start_reader(self):
+        self._local.reader = True
+
+    async def read(self, function, *args, **kwargs):
+        """
+        Runs a model read function(*args, **kwargs) on a reader thread and returns its result,
+        without blocking the event loop. SQLite releases the GIL while it executes a statement,
+        so queries awaited together (asyncio.gather) run concurrently.
+        """
+        self._check_fork()
+        with self._lock:
+            if self._readers is None:
+                self._readers = ThreadPoolExecutor(
+                    self.read_pool_size, thread_name_prefix="db-reader", initializer=self._start_reader
+                )
+            readers = self._readers
+        return await asyncio.get_running_loop().run_in_executor(readers, partial(function, *args, **kwargs))
+
+    @contextmanager
+    def transaction(self, mode="IMMEDIATE"):
+        """
+        Runs the enclosed statements of the current thread in one transaction.
+        IMMEDIATE takes the write lock up front so concurrent writers queue on busy_timeout instead of deadlocking.
+        Nested uses join the outer transaction.
+        """
+        connection = self.connection()
+        if connection.in_transaction:
+            yield connection
+            return
+
+        connection.execute(f"BEGIN {mode}")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def execute(self, sql, *args, **kwargs):
+        """
+        Executes a statement on the current thread's connection, with the same results as cs50.SQL:
+        a list of dict rows for statements that return rows, the new row id for an INSERT
+        and the number of affected rows otherwise.
+        Parameters are positional (?) or named (:name), never both.
+        """
+        if args and kwargs:
+            raise RuntimeError("cannot pass both positional and named parameters")
+
+        cursor = self.connection().execute(sql, kwargs or args)
+        try:
+            if cursor.description is not None:
+                names = [column[0] for column in cursor.description]
+                return [dict(zip(names, row)) for row in cursor.fetchall()]
+            if _is_insert(sql):
+                return cursor.lastrowid
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    def executemany(self, sql, parameters):
+        """
+        Executes a statement once per parameter sequence on the current thread's connection.
+        Returns the total number of affected rows.
+        """
+        cursor = self.connection().executemany(sql, parameters)
+        try:
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    def query(self, record_type, sql, *args, **kwargs):
+        """
+        Executes a query like execute() but returns record_type instances (see models.records)
+        built directly on the tuples sqlite3 returns.
+        """
+        if args and kwargs:
+            raise RuntimeError("cannot pass both positional and named parameters")
+
+        cursor = self.connection().execute(sql, kwargs or args)
+        try:
+            columns = _column_positions(tuple(column[0] for column in cursor.description))
+            return [record_type(columns, row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+
+# Shared connection manager and query executor used by every model
+db = ConnectionManager()
+
+
+def next_user_id(table, user_id, count=1):
+    """
+    Allocates the next per-user ID for rows of the given table from the id_sequences counters,
+    or reserves a block of `count` IDs and returns the last one.
+    A single upsert increments and returns the counter; call it inside the transaction of the insert
+    so the write lock serializes concurrent creates.
+    """
+    return db.execute(
+        """
+        INSERT INTO id_sequences (user_id, name, last_id) VALUES (?, ?, ?)
+        ON CONFLICT (user_id, name) DO UPDATE SET last_id = last_id + excluded.last_id
+        RETURNING last_id
+        """,
+        user_id,
+        table,
+        count,
+    )[0]["last_id"]
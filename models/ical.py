@@ -0,0 +1,111 @@
+import os
+from datetime import datetime, time, timedelta, timezone
+
+from .database import db
+from .task import Task
+
+# Window of deadlines published in calendar feeds, around the current day (overridable from the environment)
+ICS_HORIZON_DAYS = int(os.environ.get("ICS_HORIZON_DAYS", 180))
+ICS_PAST_DAYS = int(os.environ.get("ICS_PAST_DAYS", 30))
+# Number of events fetched from SQLite and serialized per chunk of the streamed feed
+ICS_CHUNK_SIZE = 200
+
+
+def feed_window(today):
+    """
+    Returns the [start, end) datetimes of the deadlines published on the given day.
+    """
+    midnight = datetime.combine(today, time())
+    return midnight - timedelta(days=ICS_PAST_DAYS), midnight + timedelta(days=ICS_HORIZON_DAYS)
+
+
+def feed_validators(user_id, version, changed_at, today):
+    """
+    Returns the (ETag, Last-Modified) of a user's feed, computed without reading any task.
+    The feed only changes when the user's data version does or when its window moves at midnight,
+    so both are part of the strong ETag and the later of the two is the modification time.
+    """
+    etag = f"{user_id}-{version}-{today:%Y%m%d}-{ICS_PAST_DAYS}-{ICS_HORIZON_DAYS}"
+    # Naive datetimes are local time, like the deadlines
+    window_moved = datetime.combine(today, time()).astimezone(timezone.utc)
+    last_modified = max(changed_at, window_moved) if changed_at else window_moved
+    return etag, last_modified.replace(microsecond=0)
+
+
+def _text(value):
+    """
+    Escapes a TEXT property value (RFC 5545, 3.3.11).
+    """
+    return (
+        (value or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _line(line):
+    """
+    Ends a content line with CRLF, folding it into 75-octet parts (RFC 5545, 3.1).
+    """
+    data = line.encode()
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts = []
+    while data:
+        size = 75 if not parts else 74  # Continuation lines start with a space
+        # Never split a UTF-8 sequence
+        while size < len(data) and (data[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(data[:size].decode())
+        data = data[size:]
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def generate_ics(user_id, start, end, stamp, domain, chunk_size=ICS_CHUNK_SIZE):
+    """
+    Yields the user's calendar feed as iCalendar text, one chunk of events at a time: the deadlines
+    of their 'to do' and 'in progress' tasks in [start, end), from the same data as the calendar page.
+    stamp (the feed's Last-Modified) is used as every event's DTSTAMP, so unchanged data gives the
+    same bytes. domain makes the event UIDs globally unique.
+    The rows are read through a cursor, `chunk_size` at a time, bypassing the query cache, so memory
+    stays flat however many deadlines there are. Keep the database connection of the current thread
+    (the request context) alive while iterating.
+    """
+    sql, values = Task._deadlines_query(user_id, start, end)
+    yield (
+        _line("BEGIN:VCALENDAR")
+        + _line("VERSION:2.0")
+        + _line("PRODID:-//Projects & Tasks Flow//Task deadlines//EN")
+        + _line("CALSCALE:GREGORIAN")
+        + _line("X-WR-CALNAME:Task deadlines")
+    )
+
+    dtstamp = stamp.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    cursor = db.connection().execute(sql, values)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            chunk = []
+            for task_id, title, description, status, deadline in rows:
+                # Deadlines have no time zone: publish them as floating local times
+                deadline = datetime.fromisoformat(deadline).strftime("%Y%m%dT%H%M%S")
+                chunk += [
+                    _line("BEGIN:VEVENT"),
+                    _line(f"UID:task-{user_id}-{task_id}@{domain}"),
+                    _line(f"DTSTAMP:{dtstamp}"),
+                    _line(f"DTSTART:{deadline}"),
+                    _line(f"SUMMARY:{_text(title)}"),
+                    _line(f"DESCRIPTION:{_text(description)}"),
+                    _line(f"CATEGORIES:{_text(status)}"),
+                    _line("END:VEVENT"),
+                ]
+            yield "".join(chunk)
+    finally:
+        cursor.close()
+
+    yield _line("END:VCALENDAR")
@@ -0,0 +1,181 @@
+from .database import db
+from .search import SCHEMA as SEARCH_SCHEMA, rebuild_index
+from datetime import datetime
+import hashlib
+
+
+def _iso_task_dates(connection):
+    """
+    Rewrites task dates stored as '%Y-%m-%d %I:%M:%S %p' to sortable '%Y-%m-%d %H:%M:%S'.
+    """
+    for column in ("creation_date", "deadline", "completed_date"):
+        rows = connection.execute(
+            f"SELECT rowid, {column} FROM tasks WHERE {column} LIKE '% AM' OR {column} LIKE '% PM'"
+        ).fetchall()
+        connection.executemany(
+            f"UPDATE tasks SET {column} = ? WHERE rowid = ?",
+            [
+                (datetime.strptime(value, "%Y-%m-%d %I:%M:%S %p").strftime("%Y-%m-%d %H:%M:%S"), rowid)
+                for rowid, value in rows
+            ],
+        )
+
+
+def _hash_calendar_tokens(connection):
+    """
+    Replaces the stored calendar feed tokens with their SHA-256 digests, keeping the feed URLs valid.
+    """
+    rows = connection.execute(
+        "SELECT id, calendar_token_hash FROM users WHERE calendar_token_hash IS NOT NULL"
+    ).fetchall()
+    connection.executemany(
+        "UPDATE users SET calendar_token_hash = ? WHERE id = ?",
+        [(hashlib.sha256(token.encode()).hexdigest(), user_id) for user_id, token in rows],
+    )
+
+# Numbered schema migrations, applied in order at startup.
+# A migration's version is its position in the list (starting at 1); the database stores
+# the last applied version in PRAGMA user_version.
+MIGRATIONS = [
+    # 1: Indexes for the status and deadline filters (boards, on-hold and upcoming tasks)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_status_deadline ON tasks (user_id, status, deadline)",
+    ],
+    # 2: Index for the project board and the project's linked tasks
+    [
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_project_status ON tasks (user_id, project_id, status)",
+    ],
+    # 3: Index for the weekly completion statistics
+    [
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_completed_date ON tasks (user_id, completed_date)",
+    ],
+    # 4: Index for the active projects of the dashboard
+    [
+        "CREATE INDEX IF NOT EXISTS idx_projects_user_status ON projects (user_id, status)",
+        "ANALYZE",
+    ],
+    # 5: Task dates from 12-hour strings to ISO-8601, so ORDER BY and range filters compare correctly
+    [
+        _iso_task_dates,
+        "UPDATE tasks SET deadline = NULL WHERE deadline = ''",
+        "UPDATE tasks SET completed_date = NULL WHERE completed_date = ''",
+    ],
+    # 6: Per-user ID counters for tasks and projects, seeded from the existing rows
+    [
+        """
+        CREATE TABLE IF NOT EXISTS id_sequences (
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            last_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, name)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT OR REPLACE INTO id_sequences (user_id, name, last_id)
+        SELECT user_id, 'tasks', MAX(id) FROM tasks GROUP BY user_id
+        """,
+        """
+        INSERT OR REPLACE INTO id_sequences (user_id, name, last_id)
+        SELECT user_id, 'projects', MAX(id) FROM projects GROUP BY user_id
+        """,
+    ],
+    # 7: Per-user data versions, bumped by every write, for cache coherence across workers
+    [
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+        """,
+    ],
+    # 8: Keyset pagination indexes ending in (sort column, id), replacing the indexes they extend
+    [
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_status_deadline_id ON tasks (user_id, status, deadline, id)",
+        "DROP INDEX IF EXISTS idx_tasks_user_status_deadline",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_project_status_deadline_id ON tasks (user_id, project_id, status, deadline, id)",
+        "DROP INDEX IF EXISTS idx_tasks_user_project_status",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_status_completed_date_id ON tasks (user_id, status, completed_date, id)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_user_deadline_id ON projects (user_id, deadline, id)",
+        "ANALYZE",
+    ],
+    # 9: Full-text search index over task and project text, kept in sync by triggers
+    [
+        *SEARCH_SCHEMA,
+        rebuild_index,
+    ],
+    # 10: Time of each user's last write (for Last-Modified) and calendar feed tokens
+    [
+        "ALTER TABLE data_versions ADD COLUMN updated_at TIMESTAMP",
+        "UPDATE data_versions SET updated_at = CURRENT_TIMESTAMP",
+        "ALTER TABLE users ADD COLUMN calendar_token TEXT",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_calendar_token ON users (calendar_token)",
+    ],
+    # 11: API tokens, stored as SHA-256 digests
+    [
+        """
+        CREATE TABLE IF NOT EXISTS api_tokens (
+            token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_api_tokens_user ON api_tokens (user_id)",
+    ],
+    # 12: Server-side sessions, keyed by the SHA-256 digest of the cookie's session ID
+    [
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            expires_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)",
+    ],
+    # 13: Login throttle token buckets shared by the worker processes
+    [
+        """
+        CREATE TABLE IF NOT EXISTS login_buckets (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_login_buckets_updated_at ON login_buckets (updated_at)",
+    ],
+    # 14: Calendar feed tokens, stored as SHA-256 digests like the API tokens
+    [
+        "ALTER TABLE users RENAME COLUMN calendar_token TO calendar_token_hash",
+        _hash_calendar_tokens,
+    ],
+]
+
+
+def get_version():
+    """
+    Returns the schema version stored in the database.
+    """
+    return db.execute("PRAGMA user_version")[0]["user_version"]
+
+
+def migrate():
+    """
+    Applies the migrations that are newer than the database's schema version.
+    Each migration runs in its own transaction together with the version bump, so an interrupted
+    startup resumes where it stopped. An up-to-date database costs a single PRAGMA read.
+    """
+    if get_version() >= len(MIGRATIONS):
+        return
+
+    for version, steps in enumerate(MIGRATIONS, start=1):
+        with db.transaction() as connection:
+            # Another worker may have applied it while we waited for the write lock
+            if get_version() >= version:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(connection)
+                else:
+                    connection.execute(step)
+            connection.execute(f"PRAGMA user_version = {version}")
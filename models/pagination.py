@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+
+
+def encode_cursor(value, row_id):
+    """
+    Encodes the sort value and ID of the last row of a page as an opaque, URL-safe cursor.
+    """
+    data = json.dumps([value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor made by encode_cursor back to (value, row_id).
+    Raises ValueError if the cursor was tampered with.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor") from None
+    if not isinstance(row_id, int) or not (value is None or isinstance(value, str)):
+        raise ValueError("Invalid cursor")
+    return value, row_id
+
+
+def keyset(column, cursor, descending=False):
+    """
+    Returns the WHERE condition and parameters selecting the rows after a cursor, for rows ordered
+    by (column, id), ascending or descending. Unlike OFFSET, the condition lets SQLite start the scan
+    at the cursor in a (..., column, id) index, so every page costs the same however deep it is.
+    SQLite sorts NULL before any value, so NULLs come first in ascending order and last in descending order.
+    """
+    value, row_id = decode_cursor(cursor)
+
+    if not descending:
+        if value is None:
+            return f"(({column} IS NULL AND id > ?) OR {column} IS NOT NULL)", [row_id]
+        return f"({column} >= ? AND ({column} > ? OR id > ?))", [value, value, row_id]
+
+    if value is None:
+        return f"({column} IS NULL AND id < ?)", [row_id]
+    return (
+        f"(({column} <= ? AND ({column} < ? OR id < ?)) OR {column} IS NULL)",
+        [value, value, row_id],
+    )
+
+
+def order_by(column, descending=False):
+    """
+    Returns the ORDER BY clause matching keyset().
+    """
+    direction = "DESC" if descending else "ASC"
+    return f"ORDER BY {column} {direction}, id {direction}"
@@ -0,0 +1,181 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Password hashing settings (overridable from the environment).
+# The method takes Werkzeug's syntax with its cost: "scrypt:32768:8:1", "pbkdf2:sha256:1000000", ...
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+# Hashing processes; 0 hashes in the request thread
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+# Hashes queued or running at once, and seconds a request waits for a slot before being refused
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 2 * max(PASSWORD_HASH_WORKERS, 1)))
+PASSWORD_HASH_WAIT = float(os.environ.get("PASSWORD_HASH_WAIT", 2))
+
+
+class PasswordHashingBusy(Exception):
+    """
+    Raised when every hashing slot stayed taken for PASSWORD_HASH_WAIT seconds.
+    """
+
+
+@lru_cache(maxsize=8)
+def _parameters(method):
+    """
+    Returns the method and cost prefix of the hashes generated with a method, as stored
+    ("scrypt" gives "scrypt:32768:8:1").
+    """
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+def _watch_parent(parent_pid):
+    """
+    Initializes a worker: it exits once the process that started it is gone, even if that process
+    was killed without shutting the pool down.
+    """
+
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(1)
+        os._exit(0)
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(stored_hash, password, method):
+    """
+    Checks a password and, when it matches a hash with other parameters than `method`,
+    also returns a new hash of it, computed in the same job.
+    """
+    if not check_password_hash(stored_hash, password):
+        return False, None
+    if stored_hash.split("$", 1)[0] != _parameters(method):
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+class PasswordHasher:
+    """
+    Runs password hashing in a bounded pool of processes, so that a burst of logins keeps at most
+    `workers` CPUs busy and does not hold the request threads serving other pages.
+    At most `queue` hashes are queued or running; further requests wait up to `wait` seconds
+    for a slot and then fail with PasswordHashingBusy instead of piling up.
+    """
+
+    def __init__(
+        self,
+        method=PASSWORD_HASH_METHOD,
+        workers=PASSWORD_HASH_WORKERS,
+        queue=PASSWORD_HASH_QUEUE,
+        wait=PASSWORD_HASH_WAIT,
+    ):
+        self.method = method
+        self.workers = workers
+        self.queue = queue
+        self.wait = wait
+        self._pid = None
+        self._lock = threading.Lock()
+        self._pool = None
+        self._slots = None
+        self.completed = self.rehashed = self.refused = 0
+
+    def _check_fork(self):
+        """
+        Starts a new pool in every process: a pool inherited from a parent can't be used.
+        """
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._pool = None
+            self._slots = threading.BoundedSemaphore(self.queue)
+
+    def _run(self, function, *args):
+        """
+        Runs function(*args) in the pool (or inline without workers) and returns its result.
+        """
+        self._check_fork()
+        slots = self._slots
+        if not slots.acquire(timeout=self.wait):
+            with self._lock:
+                self.refused += 1
+            raise PasswordHashingBusy("Too many password checks in progress")
+        try:
+            if self.workers <= 0:
+                result = function(*args)
+            else:
+                with self._lock:
+                    if self._pool is None:
+                        # Spawned, not forked: a forked worker would inherit the server's listening
+                        # socket and keep the port bound after the server stops
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                            initializer=_watch_parent,
+                            initargs=(os.getpid(),),
+                        )
+                    pool = self._pool
+                try:
+                    result = pool.submit(function, *args).result()
+                except BrokenProcessPool:
+                    # A worker died (killed for memory, ...): start a new pool for the next calls
+                    with self._lock:
+                        if self._pool is pool:
+                            self._pool = None
+                    raise
+        finally:
+            slots.release()
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def hash(self, password):
+        """
+        Returns a new hash of the password with the configured method and cost.
+        """
+        return self._run(_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        """
+        Checks a password against its stored hash. Returns (matches, new hash or None);
+        a new hash is returned when the stored one uses outdated parameters.
+        """
+        matches, new_hash = self._run(_verify, stored_hash, password, self.method)
+        if new_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return matches, new_hash
+
+    def shutdown(self):
+        """
+        Stops the worker processes of this process's pool.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None and self._pid == os.getpid():
+            pool.shutdown()
+
+    def stats(self):
+        """
+        Returns the completed, rehashed and refused counters of this process.
+        """
+        with self._lock:
+            return {
+                "method": self.method,
+                "workers": self.workers,
+                "completed": self.completed,
+                "rehashed": self.rehashed,
+                "refused": self.refused,
+            }
+
+
+# Shared hasher used by the User model
+password_hasher = PasswordHasher()
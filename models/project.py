@@ -1,8 +1,16 @@
-from .database import db
+from .cache import bump_version, cached
+from .database import db, next_user_id
+from .pagination import encode_cursor, keyset, order_by
+from .records import ProjectRecord
 from datetime import datetime, timedelta
 
 
 class Project:
+    # Number of projects loaded per page of the projects list
+    PAGE_LIMIT = 30
+    # Maximum number of projects returned by Project.list
+    LIST_LIMIT = 500
+
     @staticmethod
     def create_table():
         """
@@ -30,18 +38,10 @@ class Project:
     @staticmethod
     def create(title, description, user_id, **kwargs):
         """
-        Creates a new project for the specified user.
-        Generates a new project ID by finding the maximum ID for the user and incrementing it by 1.
+        Creates a new project for the specified user and returns its ID.
+        The ID comes from the user's project sequence, allocated in the same transaction as the insert.
         Formats date to '%Y-%m-%d' if provided.
         """
-        next_id = db.execute(
-            """
-            SELECT COALESCE(MAX(id), 0) + 1 
-            FROM projects WHERE user_id = ?
-            """,
-            user_id,
-        )[0]["COALESCE(MAX(id), 0) + 1"]
-
         # Format dates to "%Y-%m-%d" if provided
         start_date = kwargs.get("start_date")
         if start_date:
@@ -51,37 +51,26 @@ class Project:
         if deadline:
             deadline = datetime.strptime(deadline, "%Y-%m-%d").strftime("%Y-%m-%d")
 
-        return db.execute(
-            """
-            INSERT INTO projects (id, title, description, user_id, detailed_description, 
-                                start_date, deadline, status, priority)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            next_id,
-            title,
-            description,
-            user_id,
-            kwargs.get("detailed_description", ""),
-            start_date,
-            deadline,
-            kwargs.get("status", "to do"),
-            kwargs.get("priority", "medium"),
-        )
-
-    @staticmethod
-    def _parse_dates(project):
-        """
-        Ensures project dates are in "%Y-%m-%d" format for consistency.
-        """
-        if "start_date" in project and project["start_date"]:
-            project["start_date"] = datetime.strptime(
-                project["start_date"], "%Y-%m-%d"
-            ).strftime("%Y-%m-%d")
-        if "deadline" in project and project["deadline"]:
-            project["deadline"] = datetime.strptime(
-                project["deadline"], "%Y-%m-%d"
-            ).strftime("%Y-%m-%d")
-        return project
+        with db.transaction():
+            next_id = next_user_id("projects", user_id)
+            db.execute(
+                """
+                INSERT INTO projects (id, title, description, user_id, detailed_description, 
+                                    start_date, deadline, status, priority)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                next_id,
+                title,
+                description,
+                user_id,
+                kwargs.get("detailed_description", ""),
+                start_date,
+                deadline,
+                kwargs.get("status", "to do"),
+                kwargs.get("priority", "medium"),
+            )
+            bump_version(user_id)
+        return next_id
 
     @staticmethod
     def update(project_id, user_id, **kwargs):
@@ -106,22 +95,26 @@ class Project:
         set_clause = ", ".join([f"{key} = ?" for key in kwargs.keys()])
         values = list(kwargs.values()) + [project_id, user_id]
 
-        db.execute(
-            f"""
-            UPDATE projects 
-            SET {set_clause}
-            WHERE id = ? AND user_id = ?
-            """,
-            *values,
-        )
+        with db.transaction():
+            db.execute(
+                f"""
+                UPDATE projects 
+                SET {set_clause}
+                WHERE id = ? AND user_id = ?
+                """,
+                *values,
+            )
+            bump_version(user_id)
 
     @staticmethod
+    @cached
     def get(project_id, user_id):
         """
         Retrieves a project by its ID and user ID.
         Returns a list of projects (typically one project).
         """
-        projects = db.execute(
+        return db.query(
+            ProjectRecord,
             """
             SELECT * FROM projects 
             WHERE id = ? AND user_id = ?
@@ -130,27 +123,52 @@ class Project:
             user_id,
         )
 
-        return [Project._parse_dates(project) for project in projects]
-
     @staticmethod
+    @cached
     def get_all(user_id):
         """
         Retrieves all projects for the specified user.
         """
-        projects = db.execute("SELECT * FROM projects WHERE user_id = ?", user_id)
-        return [Project._parse_dates(project) for project in projects]
+        return db.query(
+            ProjectRecord, "SELECT * FROM projects WHERE user_id = ?", user_id
+        )
+
+    @staticmethod
+    @cached
+    def get_page(user_id, after=None, limit=PAGE_LIMIT):
+        """
+        Retrieves one page of the user's projects ordered by deadline, starting after the `after` cursor.
+        Returns (projects, cursor of the next page or None). Raises ValueError for an invalid cursor.
+        """
+        sql = "SELECT * FROM projects WHERE user_id = ?"
+        values = [user_id]
+        if after:
+            condition, condition_values = keyset("deadline", after)
+            sql += f" AND {condition}"
+            values += condition_values
+        # One extra row tells whether there is a next page
+        sql += f" {order_by('deadline')} LIMIT ?"
+        values.append(limit + 1)
+
+        projects = db.query(ProjectRecord, sql, *values)
+        if len(projects) <= limit:
+            return projects, None
+        projects = projects[:limit]
+        return projects, encode_cursor(projects[-1].raw("deadline"), projects[-1]["id"])
 
     @staticmethod
+    @cached
     def get_active_projects(user_id):
         """
         Retrieves active projects (with status 'in progress') for the specified user.
         Includes a count of active tasks (tasks with status 'in progress' or 'blocked').
         """
-        return db.execute(
+        return db.query(
+            ProjectRecord,
             """
             SELECT p.*, COUNT(t.id) as active_tasks
             FROM projects p
-            JOIN tasks t ON p.id = t.project_id 
+            JOIN tasks t ON p.id = t.project_id AND p.user_id = t.user_id
             AND t.status IN ('in progress', 'blocked')
             WHERE p.user_id = ? AND p.status = 'in progress'
             GROUP BY p.id
@@ -158,23 +176,56 @@ class Project:
             user_id,
         )
 
+    @staticmethod
+    async def get_active_projects_async(user_id):
+        """
+        Async variant of get_active_projects, run on the database's read pool.
+        """
+        return await db.read(Project.get_active_projects, user_id)
+
+    @staticmethod
+    def list(user_id, after=0, limit=LIST_LIMIT, status=None):
+        """
+        Retrieves up to `limit` of the user's projects with an ID greater than `after`, in ID order,
+        optionally only those with the given status.
+        """
+        sql = "SELECT * FROM projects WHERE user_id = ? AND id > ?"
+        values = [user_id, after]
+        if status is not None:
+            sql += " AND status = ?"
+            values.append(status)
+        sql += " ORDER BY id LIMIT ?"
+        values.append(min(limit, Project.LIST_LIMIT))
+        return db.query(ProjectRecord, sql, *values)
+
     @staticmethod
     def get_recent(user_id):
         """
         Retrieves projects from the last 7 days with status 'to do' for the specified user.
         """
         seven_days_ago = datetime.now() - timedelta(days=7)
-        projects = db.execute(
+        return db.query(
+            ProjectRecord,
             "SELECT * FROM projects WHERE user_id = ? AND status = 'to do' AND start_date >= ?",
-            (user_id, seven_days_ago.strftime('%Y-%m-%d'))
+            user_id,
+            seven_days_ago.strftime('%Y-%m-%d'),
         )
-        return [Project._parse_dates(project) for project in projects]
 
     @staticmethod
     def delete(project_id, user_id):
         """
         Deletes a project by its ID and user ID.
-        """
-        db.execute(
-            "DELETE FROM projects WHERE id = ? AND user_id = ?", project_id, user_id
-        )
\ No newline at end of file
+        Its tasks are detached (project_id set to NULL) by one UPDATE in the same transaction.
+        Returns the number of tasks detached.
+        """
+        with db.transaction():
+            detached = db.execute(
+                "UPDATE tasks SET project_id = NULL WHERE project_id = ? AND user_id = ?",
+                project_id,
+                user_id,
+            )
+            db.execute(
+                "DELETE FROM projects WHERE id = ? AND user_id = ?", project_id, user_id
+            )
+            bump_version(user_id)
+        return detached
\ No newline at end of file
@@ -0,0 +1,124 @@
+from datetime import date, datetime
+
+
+class Record:
+    """
+    Read-only row backed by the tuple sqlite3 returns, instead of a dict per row.
+    Columns are read as record["title"] or record.title (so templates keep working), and date
+    columns are only parsed the first time they are read, then memoized.
+    """
+
+    __slots__ = ("_columns", "_row", "_parsed")
+
+    # Columns holding dates, parsed on first access
+    DATE_FIELDS = frozenset()
+
+    def __init__(self, columns, row):
+        """
+        columns maps each column name to its position in row; it is shared by every record of a query.
+        """
+        self._columns = columns
+        self._row = row
+        self._parsed = None
+
+    @staticmethod
+    def _parse_date(value):
+        """
+        Converts a stored date string to a Python object.
+        """
+        return value
+
+    def __getitem__(self, key):
+        value = self._row[self._columns[key]]
+        if value and key in self.DATE_FIELDS:
+            if self._parsed is None:
+                self._parsed = {}
+            if key not in self._parsed:
+                self._parsed[key] = self._parse_date(value)
+            return self._parsed[key]
+        return value
+
+    def __getattr__(self, key):
+        if key.startswith("_"):
+            raise AttributeError(key)
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def __contains__(self, key):
+        return key in self._columns
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return self._columns == other._columns and self._row == other._row
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._row)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def get(self, key, default=None):
+        """
+        Returns a column's value, or default if the record has no such column.
+        """
+        if key not in self._columns:
+            return default
+        return self[key]
+
+    def keys(self):
+        return self._columns.keys()
+
+    def values(self):
+        return [self[key] for key in self._columns]
+
+    def items(self):
+        return [(key, self[key]) for key in self._columns]
+
+    def raw(self, key):
+        """
+        Returns a column's value as stored, without date parsing.
+        """
+        return self._row[self._columns[key]]
+
+    def to_dict(self):
+        """
+        Returns the record as a plain dict (dates parsed).
+        """
+        return dict(self.items())
+
+
+class TaskRecord(Record):
+    """
+    A row of the 'tasks' table; dates are datetime objects.
+    """
+
+    __slots__ = ()
+
+    DATE_FIELDS = frozenset(("creation_date", "deadline", "completed_date"))
+
+    @staticmethod
+    def _parse_date(value):
+        return datetime.fromisoformat(value)
+
+
+class ProjectRecord(Record):
+    """
+    A row of the 'projects' table; dates are date objects (rendered as '%Y-%m-%d').
+    """
+
+    __slots__ = ()
+
+    DATE_FIELDS = frozenset(("start_date", "deadline"))
+
+    @staticmethod
+    def _parse_date(value):
+        return date.fromisoformat(value)
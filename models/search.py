@@ -0,0 +1,159 @@
+import re
+
+from markupsafe import Markup, escape
+
+from .database import db
+
+# Number of results per page of the search page
+SEARCH_PAGE_SIZE = 20
+# Shortest last word matched as a prefix (shorter prefixes expand to too many terms)
+MIN_PREFIX_LENGTH = 3
+# Relative weight of matches in the title, description and detailed description
+RANK_WEIGHTS = (10.0, 3.0, 1.0)
+# Kinds of indexed rows, stored in bit 32 of the index rowid
+KINDS = ("task", "project")
+
+# Private markers wrapped around matched terms by highlight()/snippet(), turned into <mark> after escaping
+_MARK_START, _MARK_END = "\x02", "\x03"
+
+# Index rowids pack the owner, the kind and the per-user ID: (user_id << 33) | (kind << 32) | id.
+# A user's rows then form one rowid range, which FTS5 filters on before ranking.
+SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        title, description, detailed_description,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_search_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO search_index (rowid, title, description, detailed_description)
+        VALUES ((NEW.user_id << 33) | NEW.id, NEW.title, NEW.description, NEW.detailed_description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_search_update
+    AFTER UPDATE OF title, description, detailed_description ON tasks BEGIN
+        UPDATE search_index
+        SET title = NEW.title, description = NEW.description, detailed_description = NEW.detailed_description
+        WHERE rowid = (OLD.user_id << 33) | OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_search_delete AFTER DELETE ON tasks BEGIN
+        DELETE FROM search_index WHERE rowid = (OLD.user_id << 33) | OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_search_insert AFTER INSERT ON projects BEGIN
+        INSERT INTO search_index (rowid, title, description, detailed_description)
+        VALUES ((NEW.user_id << 33) | (1 << 32) | NEW.id, NEW.title, NEW.description, NEW.detailed_description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_search_update
+    AFTER UPDATE OF title, description, detailed_description ON projects BEGIN
+        UPDATE search_index
+        SET title = NEW.title, description = NEW.description, detailed_description = NEW.detailed_description
+        WHERE rowid = (OLD.user_id << 33) | (1 << 32) | OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS projects_search_delete AFTER DELETE ON projects BEGIN
+        DELETE FROM search_index WHERE rowid = (OLD.user_id << 33) | (1 << 32) | OLD.id;
+    END
+    """,
+]
+
+
+def rebuild_index(connection):
+    """
+    Refills the search index from the tasks and projects tables and merges its segments.
+    Used by the migration that creates the index and by `flask rebuild-search`.
+    """
+    connection.execute("DELETE FROM search_index")
+    connection.execute(
+        """
+        INSERT INTO search_index (rowid, title, description, detailed_description)
+        SELECT (user_id << 33) | id, title, description, detailed_description FROM tasks
+        """
+    )
+    connection.execute(
+        """
+        INSERT INTO search_index (rowid, title, description, detailed_description)
+        SELECT (user_id << 33) | (1 << 32) | id, title, description, detailed_description FROM projects
+        """
+    )
+    connection.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+
+def match_query(text):
+    """
+    Turns free text typed by a user into an FTS5 query: every word must match, and the last word
+    (if long enough) also matches as a prefix so results appear while typing. Words are quoted,
+    so FTS5 operators and punctuation in the text are searched literally instead of raising syntax errors.
+    Returns None if the text has no words.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    terms = ['"' + word.replace('"', '""') + '"' for word in words]
+    if len(words[-1]) >= MIN_PREFIX_LENGTH:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _marked(text):
+    """
+    Escapes indexed text for HTML and wraps its matched terms in <mark>.
+    """
+    if not text:
+        return Markup("")
+    return Markup(
+        str(escape(text)).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+    )
+
+
+def search(user_id, text, page=1, limit=SEARCH_PAGE_SIZE):
+    """
+    Searches the user's tasks and projects, best matches first (BM25, title matches weighted most).
+    Returns {"results": [...], "page": n, "has_more": bool}; each result has 'kind' ('task' or
+    'project'), 'id', and 'title' and 'snippet' as HTML-safe markup with the matches highlighted.
+    """
+    query = match_query(text)
+    page = max(int(page), 1)
+    if query is None:
+        return {"results": [], "page": page, "has_more": False}
+
+    # Ranked results have no stable sort key to continue from, so pages use OFFSET
+    rows = db.execute(
+        f"""
+        SELECT rowid,
+               highlight(search_index, 0, ?, ?) AS title,
+               snippet(search_index, -1, ?, ?, '…', 16) AS snippet
+        FROM search_index
+        WHERE search_index MATCH ? AND rowid BETWEEN ? AND ?
+        ORDER BY bm25(search_index, {', '.join(map(str, RANK_WEIGHTS))})
+        LIMIT ? OFFSET ?
+        """,
+        _MARK_START,
+        _MARK_END,
+        _MARK_START,
+        _MARK_END,
+        query,
+        user_id << 33,
+        ((user_id + 1) << 33) - 1,
+        limit + 1,
+        (page - 1) * limit,
+    )
+
+    results = [
+        {
+            "kind": KINDS[(row["rowid"] >> 32) & 1],
+            "id": row["rowid"] & 0xFFFFFFFF,
+            "title": _marked(row["title"]),
+            "snippet": _marked(row["snippet"]),
+        }
+        for row in rows[:limit]
+    ]
+    return {"results": results, "page": page, "has_more": len(rows) > limit}
@@ -1,10 +1,37 @@
-from .database import db
-from datetime import datetime
+from .cache import bump_version, cached
+from .database import db, next_user_id
+from .pagination import encode_cursor, keyset, order_by
+from .records import TaskRecord
+from datetime import datetime, timedelta
+from functools import lru_cache
 
 
 class Task:
     VALID_STATUSES = ("to do", "in progress", "done", "blocked")
     VALID_PRIORITIES = ("low", "medium", "high", "urgent")
+    # ISO-8601 storage format: sorts lexically in chronological order, so range filters can use indexes
+    DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+    # Maximum number of tasks in each list shown on the dashboard
+    DASHBOARD_LIMIT = 20
+    # Number of tasks loaded per page of a board column
+    BOARD_LIMIT = 50
+    # Operations accepted by Task.bulk_update
+    BULK_OPERATIONS = ("status", "priority", "project", "delete")
+    # Board column name of each status
+    BOARD_COLUMNS = {
+        "to do": "to_do_tasks",
+        "in progress": "in_progress_tasks",
+        "done": "done_tasks",
+        "blocked": "blocked_tasks",
+    }
+    # Maximum number of tasks returned by Task.list
+    LIST_LIMIT = 500
+    # Statuses of the tasks shown on the calendar
+    CALENDAR_STATUSES = ("to do", "in progress")
+    # Longest date range served by the calendar event feed
+    CALENDAR_MAX_DAYS = 366
+    # Sort column of each board column's pages, and whether it is descending (deadline ascending otherwise)
+    COLUMN_ORDER = {"done": ("completed_date", True)}
 
     @staticmethod
     def create_table() -> None:
@@ -56,11 +83,11 @@ class Task:
             )
 
     @staticmethod
-    def create(title: str, description: str, user_id: int, **kwargs) -> None:
+    def create(title: str, description: str, user_id: int, **kwargs) -> int:
         """
-        Creates a new task for the specified user.
-        Generates a new task ID by finding the maximum ID for the user and incrementing it by 1.
-        Formats date to '%Y-%m-%d %I:%M:%S %p' if provided.
+        Creates a new task for the specified user and returns its ID.
+        The ID comes from the user's task sequence, allocated in the same transaction as the insert.
+        Formats dates to Task.DATE_FORMAT if provided.
         """
         if not title or not description or not user_id:
             raise ValueError("Title and description are required")
@@ -70,59 +97,46 @@ class Task:
         if "priority" in kwargs:
             Task.validate_priority(kwargs["priority"])
 
-        # Generate creation_date in AM/PM format
-        creation_date = datetime.now().strftime("%Y-%m-%d %I:%M:%S %p")
-        deadline = kwargs.get("deadline")
-        if deadline:
-            deadline = datetime.strptime(deadline, "%Y-%m-%d %I:%M:%S %p").strftime(
-                "%Y-%m-%d %I:%M:%S %p"
+        creation_date = datetime.now().strftime(Task.DATE_FORMAT)
+        deadline = Task._format_date(kwargs.get("deadline"))
+        completed_date = Task._format_date(kwargs.get("completed_date"))
+
+        with db.transaction():
+            next_id: int = next_user_id("tasks", user_id)
+            db.execute(
+                """
+                INSERT INTO tasks (id, title, description, user_id, project_id,
+                                 detailed_description, creation_date, deadline, status, priority, completed_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                next_id,
+                title,
+                description,
+                user_id,
+                kwargs.get("project_id", None),
+                kwargs.get("detailed_description", ""),
+                creation_date,
+                deadline,
+                kwargs.get("status", "to do"),
+                kwargs.get("priority", "medium"),
+                completed_date,
             )
-        completed_date = kwargs.get("completed_date")
-        if completed_date:
-            completed_date = datetime.strptime(
-                completed_date, "%Y-%m-%d %I:%M:%S %p"
-            ).strftime("%Y-%m-%d %I:%M:%S %p")
-
-        next_id: int = db.execute(
-            """
-            SELECT COALESCE(MAX(id), 0) + 1 
-            FROM tasks WHERE user_id = ?
-            """,
-            user_id,
-        )[0]["COALESCE(MAX(id), 0) + 1"]
-
-        return db.execute(
-            """
-            INSERT INTO tasks (id, title, description, user_id, project_id,
-                             detailed_description, creation_date, deadline, status, priority, completed_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            next_id,
-            title,
-            description,
-            user_id,
-            kwargs.get("project_id", None),
-            kwargs.get("detailed_description", ""),
-            creation_date,
-            deadline,
-            kwargs.get("status", "to do"),
-            kwargs.get("priority", "medium"),
-            completed_date,
-        )
+            bump_version(user_id)
+        return next_id
 
     @staticmethod
     def update(task_id: int, user_id: int, **kwargs) -> None:
         """
         Updates a task with the provided fields.
         Automatically sets the completed_date if the status is updated to 'done'.
-        Formats date to '%Y-%m-%d %I:%M:%S %p' if provided.
+        Formats dates to Task.DATE_FORMAT if provided.
         Dynamically constructs the SET clause based on the provided kwargs.
         """
         if not task_id or not user_id:
             raise ValueError("task_id and user_id are required")
 
         if "status" in kwargs and kwargs["status"] == "done":
-            kwargs["completed_date"] = datetime.now().strftime("%Y-%m-%d %I:%M:%S %p")
+            kwargs["completed_date"] = datetime.now().strftime(Task.DATE_FORMAT)
 
         if "status" in kwargs:
             Task.validate_status(kwargs["status"])
@@ -131,6 +145,9 @@ class Task:
         if "project_id" in kwargs:
             if kwargs["project_id"] == "":
                 kwargs["project_id"] = None
+        for key in ("deadline", "completed_date"):
+            if key in kwargs:
+                kwargs[key] = Task._format_date(kwargs[key])
 
         allowed_columns = {
             "project_id",
@@ -149,40 +166,109 @@ class Task:
         if not update_data:
             raise ValueError("No valid columns provided for update")
 
-        set_clause = ", ".join([f"{key} = ?" for key in update_data])
-        values = list(update_data.values()) + [task_id, user_id]
+        columns = tuple(sorted(update_data))
+        values = [update_data[key] for key in columns] + [task_id, user_id]
 
-        db.execute(
-            f"UPDATE tasks SET {set_clause} WHERE id = ? AND user_id = ?", *values
-        )
+        with db.transaction():
+            db.execute(Task._update_sql(columns), *values)
+            bump_version(user_id)
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _update_sql(columns: tuple) -> str:
+        """
+        Builds the UPDATE statement for a set of columns.
+        Cached so the same column set always reuses the same SQL text (and prepared statement).
+        """
+        set_clause = ", ".join([f"{key} = ?" for key in columns])
+        return f"UPDATE tasks SET {set_clause} WHERE id = ? AND user_id = ?"
 
     @staticmethod
     def delete(task_id, user_id):
         """
         Deletes a task by its ID and user ID.
         """
-        db.execute("DELETE FROM tasks WHERE id = ? AND user_id = ?", task_id, user_id)
+        with db.transaction():
+            db.execute("DELETE FROM tasks WHERE id = ? AND user_id = ?", task_id, user_id)
+            bump_version(user_id)
 
     @staticmethod
-    def _parse_dates(task):
+    def bulk_update(user_id: int, task_ids, operation: str, value=None) -> int:
         """
-        Ensures task dates are in '%Y-%m-%d %I:%M:%S %p' format for consistency.
+        Applies one operation to many tasks of the user in a single transaction:
+        'status' and 'priority' set the value (validated like Task.update), 'project' moves the tasks
+        to the project ID in value (None or '' to unlink them) and 'delete' removes them.
+        task_ids must be a list of integers. Returns the number of tasks changed.
         """
-        if "creation_date" in task and task["creation_date"]:
-            task["creation_date"] = datetime.strptime(
-                task["creation_date"], "%Y-%m-%d %I:%M:%S %p"
-            )
-        if "deadline" in task and task["deadline"]:
-            task["deadline"] = datetime.strptime(
-                task["deadline"], "%Y-%m-%d %I:%M:%S %p"
-            )
-        if "completed_date" in task and task["completed_date"]:
-            task["completed_date"] = datetime.strptime(
-                task["completed_date"], "%Y-%m-%d %I:%M:%S %p"
+        if not user_id:
+            raise ValueError("user_id is required")
+        if operation not in Task.BULK_OPERATIONS:
+            raise ValueError(
+                f"Invalid operation. Must be one of: {', '.join(Task.BULK_OPERATIONS)}"
             )
-        return task
+        # No coercion: a string would be read one digit at a time and a float truncated
+        if not isinstance(task_ids, list) or any(
+            isinstance(task_id, bool) or not isinstance(task_id, int) for task_id in task_ids
+        ):
+            raise ValueError("task_ids must be a list of integers")
+        task_ids = sorted(set(task_ids))
+        if not task_ids:
+            return 0
+
+        if operation == "delete":
+            sql = "DELETE FROM tasks WHERE id = ? AND user_id = ?"
+            parameters = [(task_id, user_id) for task_id in task_ids]
+        elif operation == "status":
+            Task.validate_status(value)
+            if value == "done":
+                completed_date = datetime.now().strftime(Task.DATE_FORMAT)
+                sql = Task._update_sql(("completed_date", "status"))
+                parameters = [(completed_date, value, task_id, user_id) for task_id in task_ids]
+            else:
+                sql = Task._update_sql(("status",))
+                parameters = [(value, task_id, user_id) for task_id in task_ids]
+        else:
+            if operation == "priority":
+                Task.validate_priority(value)
+                column = "priority"
+            else:
+                if value in (None, ""):
+                    value = None
+                elif isinstance(value, bool) or not isinstance(value, (int, str)):
+                    raise ValueError("Project ID must be an integer")
+                else:
+                    try:
+                        value = int(value)
+                    except ValueError:
+                        raise ValueError("Project ID must be an integer") from None
+                column = "project_id"
+            sql = Task._update_sql((column,))
+            parameters = [(value, task_id, user_id) for task_id in task_ids]
+
+        with db.transaction():
+            if operation == "project" and value is not None:
+                if not db.execute(
+                    "SELECT 1 FROM projects WHERE id = ? AND user_id = ?", value, user_id
+                ):
+                    raise ValueError("Project not found.")
+            changed = db.executemany(sql, parameters)
+            bump_version(user_id)
+        return changed
 
     @staticmethod
+    def _format_date(value):
+        """
+        Normalizes an ISO-8601 date string (or datetime) to Task.DATE_FORMAT.
+        Empty values become None.
+        """
+        if not value:
+            return None
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        return value.strftime(Task.DATE_FORMAT)
+
+    @staticmethod
+    @cached
     def get(user_id: int, **kwargs) -> list:
         """
         Retrieves tasks based on the provided filters.
@@ -213,27 +299,36 @@ class Task:
         if not get_data:
             raise ValueError("No valid columns provided")
 
-        where_clause = " AND " + "AND ".join([f"{key} = ? " for key in get_data])
-        values = [user_id] + list(get_data.values())
-        tasks = db.execute(
-            f"SELECT * From tasks WHERE user_id = ? {where_clause}", *values
-        )
-        return [Task._parse_dates(task) for task in tasks]
+        columns = tuple(sorted(get_data))
+        values = [user_id] + [get_data[key] for key in columns]
+        return db.query(TaskRecord, Task._select_sql(columns), *values)
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _select_sql(columns: tuple) -> str:
+        """
+        Builds the filtered SELECT statement for a set of columns.
+        Cached so the same column set always reuses the same SQL text (and prepared statement).
+        """
+        where_clause = " AND " + "AND ".join([f"{key} = ? " for key in columns])
+        return f"SELECT * From tasks WHERE user_id = ? {where_clause}"
 
     @staticmethod
     def get_all(user_id):
         """
         Retrieves all tasks for the specified user.
         """
-        tasks = db.execute("SELECT * FROM tasks WHERE user_id = ?", user_id)
-        return [Task._parse_dates(task) for task in tasks]
+        return db.query(
+            TaskRecord, "SELECT * FROM tasks WHERE user_id = ?", user_id
+        )
 
     @staticmethod
     def get_by_project(project_id, user_id):
         """
         Retrieves tasks associated with the specified project.
         """
-        tasks = db.execute(
+        return db.query(
+            TaskRecord,
             """
             SELECT * FROM tasks 
             WHERE project_id = ? AND user_id = ?
@@ -241,44 +336,44 @@ class Task:
             project_id,
             user_id,
         )
-        return [Task._parse_dates(task) for task in tasks]
 
     @staticmethod
     def get_in_progress(user_id):
         """
         Retrieves tasks with status 'in progress' for the specified user.
         """
-        tasks = db.execute(
+        return db.query(
+            TaskRecord,
             "SELECT * FROM tasks WHERE user_id = ? AND status = 'in progress'", user_id
         )
-        return [Task._parse_dates(task) for task in tasks]
 
     @staticmethod
     def get_done(user_id):
         """
         Retrieves tasks with status 'done' for the specified user.
         """
-        tasks = db.execute(
+        return db.query(
+            TaskRecord,
             "SELECT * FROM tasks WHERE user_id = ? AND status = 'done'", user_id
         )
-        return [Task._parse_dates(task) for task in tasks]
 
     @staticmethod
     def get_blocked(user_id):
         """
         Retrieves tasks with status 'blocked' for the specified user.
         """
-        tasks = db.execute(
+        return db.query(
+            TaskRecord,
             "SELECT * FROM tasks WHERE user_id = ? AND status = 'blocked'", user_id
         )
-        return [Task._parse_dates(task) for task in tasks]
 
     @staticmethod
     def get_tasks_on_hold(user_id):
         """
         Retrieves tasks with status 'to do' or 'blocked' for the specified user.
         """
-        tasks = db.execute(
+        return db.query(
+            TaskRecord,
             """
             SELECT * FROM tasks 
             WHERE user_id = ? AND status IN ('to do', 'blocked')
@@ -286,50 +381,297 @@ class Task:
             """,
             user_id,
         )
-        return [Task._parse_dates(task) for task in tasks]
 
     @staticmethod
     def get_completed_this_week(user_id):
         """
-        Retrieves tasks completed in the current week for the specified user.
+        Retrieves tasks completed in the current week (starting on Monday) for the specified user.
         """
-        tasks = db.execute(
+        return db.query(
+            TaskRecord,
             """
             SELECT * FROM tasks 
             WHERE user_id = ? 
+            AND completed_date >= ? AND completed_date < ?
             AND status = 'done' 
-            AND completed_date IS NOT NULL
-            AND strftime('%Y-%W', substr(completed_date, 1, 10)) = strftime('%Y-%W', 'now')
             """,
             user_id,
+            *Task._week_bounds(),
         )
-        return [Task._parse_dates(task) for task in tasks]
 
     @staticmethod
     def get_upcoming_tasks(user_id, days=7):
         """
         Retrieves tasks with deadlines within the next number of days for the specified user.
         """
-        tasks = db.execute(
+        return db.query(
+            TaskRecord,
             """ 
             SELECT * FROM tasks
             WHERE user_id = ?
-            AND status != 'done'
-            AND status != 'in progress'
-            AND deadline BETWEEN date('now') AND date('now', '+' || ? || ' days')
+            AND status IN ('to do', 'blocked')
+            AND deadline >= ? AND deadline < ?
             ORDER BY deadline ASC 
             """,
             user_id,
-            days,
+            *Task._upcoming_bounds(days),
+        )
+
+    @staticmethod
+    def _page(user_id, status, project_id=None, after=None, limit=BOARD_LIMIT):
+        """
+        Runs the keyset query of one board column; returns (tasks, cursor of the next page or None).
+        """
+        column, descending = Task.COLUMN_ORDER.get(status, ("deadline", False))
+        sql = "SELECT * FROM tasks WHERE user_id = ? AND status = ?"
+        values = [user_id, status]
+        if project_id is not None:
+            sql += " AND project_id = ?"
+            values.append(project_id)
+        if after:
+            condition, condition_values = keyset(column, after, descending)
+            sql += f" AND {condition}"
+            values += condition_values
+        sql += " " + order_by(column, descending)
+        if limit is not None:
+            # One extra row tells whether there is a next page
+            sql += " LIMIT ?"
+            values.append(limit + 1)
+
+        tasks = db.query(TaskRecord, sql, *values)
+        if limit is None or len(tasks) <= limit:
+            return tasks, None
+        tasks = tasks[:limit]
+        return tasks, encode_cursor(tasks[-1].raw(column), tasks[-1]["id"])
+
+    @staticmethod
+    @cached
+    def get_page(user_id, status, project_id=None, after=None, limit=BOARD_LIMIT):
+        """
+        Retrieves one page of a board column: the user's tasks with the given status (optionally
+        only those of a project) that come after the `after` cursor, in the column's order.
+        Returns (tasks, cursor of the next page or None). Raises ValueError for an invalid cursor.
+        """
+        if not user_id:
+            raise ValueError("user_id is required")
+        Task.validate_status(status)
+        return Task._page(user_id, status, project_id, after, limit)
+
+    @staticmethod
+    @cached
+    def get_board(user_id, project_id=None, limit=BOARD_LIMIT):
+        """
+        Retrieves the first page of each board column for the user's tasks (optionally only those
+        of a project).
+        Returns a dict with a list per column ('to_do_tasks', 'in_progress_tasks', 'done_tasks',
+        'blocked_tasks'), plus 'counts' (tasks per column) and 'next' (cursor of each column's
+        next page for Task.get_page, or None).
+        """
+        if not user_id:
+            raise ValueError("user_id is required")
+
+        project_filter = "AND project_id = ?" if project_id is not None else ""
+        values = [user_id] + ([project_id] if project_id is not None else [])
+        totals = db.execute(
+            f"SELECT status, COUNT(*) AS total FROM tasks WHERE user_id = ? {project_filter} GROUP BY status",
+            *values,
         )
-        return [Task._parse_dates(task) for task in tasks]
+
+        board = {"counts": dict.fromkeys(Task.BOARD_COLUMNS.values(), 0), "next": {}}
+        for row in totals:
+            board["counts"][Task.BOARD_COLUMNS[row["status"]]] = row["total"]
+        for status, column in Task.BOARD_COLUMNS.items():
+            if board["counts"][column]:
+                board[column], board["next"][column] = Task._page(user_id, status, project_id, None, limit)
+            else:
+                board[column], board["next"][column] = [], None
+        return board
+
+    @staticmethod
+    @cached
+    def get_deadlines(user_id, start, end, statuses=CALENDAR_STATUSES):
+        """
+        Retrieves the user's tasks with the given statuses whose deadline falls in [start, end),
+        ordered by deadline. start and end are datetimes or ISO-8601 strings.
+        Returns compact dicts with 'id', 'title', 'description', 'status' and 'deadline'
+        (as an ISO-8601 string, not parsed).
+        """
+        sql, values = Task._deadlines_query(user_id, start, end, statuses)
+        return db.execute(sql, *values)
+
+    @staticmethod
+    def _deadlines_query(user_id, start, end, statuses=CALENDAR_STATUSES):
+        """
+        Builds the query of Task.get_deadlines and its parameters, for callers that read its rows
+        through a cursor. Selects id, title, description, status and deadline, in this order.
+        """
+        if not user_id:
+            raise ValueError("user_id is required")
+        for status in statuses:
+            Task.validate_status(status)
+
+        sql = f"""
+            SELECT id, title, description, status, replace(deadline, ' ', 'T') AS deadline
+            FROM tasks
+            WHERE user_id = ? AND status IN ({', '.join('?' * len(statuses))})
+            AND deadline >= ? AND deadline < ?
+            ORDER BY deadline
+            """
+        return sql, [user_id, *statuses, Task._format_date(start), Task._format_date(end)]
+
+    @staticmethod
+    def _week_bounds():
+        """
+        Returns the start (Monday 00:00) and end of the current week in Task.DATE_FORMAT.
+        """
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        week_start = today - timedelta(days=today.weekday())
+        return (
+            week_start.strftime(Task.DATE_FORMAT),
+            (week_start + timedelta(days=7)).strftime(Task.DATE_FORMAT),
+        )
+
+    @staticmethod
+    def _upcoming_bounds(days):
+        """
+        Returns the start (today 00:00) and end of the next number of days in Task.DATE_FORMAT.
+        """
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return (
+            today.strftime(Task.DATE_FORMAT),
+            (today + timedelta(days=days)).strftime(Task.DATE_FORMAT),
+        )
+
+    @staticmethod
+    @cached
+    def get_dashboard_stats(user_id, days=7):
+        """
+        Counts the user's tasks for the dashboard in a single aggregate query.
+        Returns the total, done, on hold (to do or blocked), upcoming (on hold with a deadline within
+        the next number of days) and completed-this-week counts, plus the percentage of the week's
+        workload completed.
+        """
+        stats = db.execute(
+            """
+            SELECT COUNT(*) AS total,
+                   COALESCE(SUM(status = 'done'), 0) AS done,
+                   COALESCE(SUM(status IN ('to do', 'blocked')), 0) AS on_hold,
+                   COALESCE(SUM(status IN ('to do', 'blocked')
+                                AND deadline >= ? AND deadline < ?), 0) AS upcoming,
+                   COALESCE(SUM(status = 'done'
+                                AND completed_date >= ? AND completed_date < ?), 0) AS completed_this_week
+            FROM tasks
+            WHERE user_id = ?
+            """,
+            *Task._upcoming_bounds(days),
+            *Task._week_bounds(),
+            user_id,
+        )[0]
+
+        # Tasks still open plus the ones closed this week make up the week's workload
+        denominator = stats["total"] - stats["done"] + stats["completed_this_week"]
+        if denominator == 0:
+            stats["completed_this_week_percent"] = 0  # Default value
+        else:
+            stats["completed_this_week_percent"] = round(
+                (stats["completed_this_week"] / denominator) * 100,
+                1,
+            )
+        return stats
+
+    @staticmethod
+    @cached
+    def get_dashboard_lists(user_id, limit=DASHBOARD_LIMIT, days=7):
+        """
+        Retrieves the dashboard task lists in one query: 'in_progress', 'on_hold' (to do or blocked)
+        and 'upcoming' (on hold with a deadline within the next number of days).
+        Each list is ordered by deadline and holds at most `limit` tasks.
+        """
+        tasks = db.query(
+            TaskRecord,
+            """
+            SELECT * FROM (
+                SELECT 'in_progress' AS bucket, * FROM tasks
+                WHERE user_id = ? AND status = 'in progress'
+                ORDER BY deadline ASC LIMIT ?
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'on_hold' AS bucket, * FROM tasks
+                WHERE user_id = ? AND status IN ('to do', 'blocked')
+                ORDER BY deadline ASC LIMIT ?
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'upcoming' AS bucket, * FROM tasks
+                WHERE user_id = ? AND status IN ('to do', 'blocked')
+                AND deadline >= ? AND deadline < ?
+                ORDER BY deadline ASC LIMIT ?
+            )
+            """,
+            user_id,
+            limit,
+            user_id,
+            limit,
+            user_id,
+            *Task._upcoming_bounds(days),
+            limit,
+        )
+
+        lists = {"in_progress": [], "on_hold": [], "upcoming": []}
+        for task in tasks:
+            lists[task["bucket"]].append(task)
+        return lists
+
+    @staticmethod
+    async def get_dashboard_stats_async(user_id, days=7):
+        """
+        Async variant of get_dashboard_stats, run on the database's read pool.
+        """
+        return await db.read(Task.get_dashboard_stats, user_id, days)
+
+    @staticmethod
+    async def get_dashboard_lists_async(user_id, limit=DASHBOARD_LIMIT, days=7):
+        """
+        Async variant of get_dashboard_lists, run on the database's read pool.
+        """
+        return await db.read(Task.get_dashboard_lists, user_id, limit, days)
 
     @staticmethod
     def get_all_unassigned(user_id):
         """
         Retrieves tasks that aren't assigned to any project for the specified user.
         """
-        tasks = db.execute(
+        return db.query(
+            TaskRecord,
             "SELECT * FROM tasks WHERE project_id IS NULL AND user_id = ?", user_id
         )
-        return [Task._parse_dates(task) for task in tasks]
\ No newline at end of file
+
+    @staticmethod
+    def list(user_id, after=0, limit=LIST_LIMIT, **filters):
+        """
+        Retrieves up to `limit` of the user's tasks with an ID greater than `after`, in ID order,
+        optionally filtered by status, priority or project_id (None for tasks without a project).
+        Continue with after = the last ID returned to read all tasks page by page.
+        """
+        if not user_id:
+            raise ValueError("user_id is required")
+        if "status" in filters:
+            Task.validate_status(filters["status"])
+        if "priority" in filters:
+            Task.validate_priority(filters["priority"])
+        unknown = set(filters) - {"status", "priority", "project_id"}
+        if unknown:
+            raise ValueError(f"Unknown filter: {', '.join(sorted(unknown))}")
+
+        sql = "SELECT * FROM tasks WHERE user_id = ? AND id > ?"
+        values = [user_id, after]
+        for key in sorted(filters):
+            if key == "project_id" and filters[key] is None:
+                sql += " AND project_id IS NULL"
+            else:
+                sql += f" AND {key} = ?"
+                values.append(filters[key])
+        sql += " ORDER BY id LIMIT ?"
+        values.append(min(limit, Task.LIST_LIMIT))
+        return db.query(TaskRecord, sql, *values)
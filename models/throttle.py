@@ -0,0 +1,159 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .database import db
+
+# Login attempts allowed in a burst and refilled per minute, per username and per client address
+# (overridable from the environment). Addresses get more because offices share one behind NAT.
+LOGIN_THROTTLE_USERNAME_BURST = int(os.environ.get("LOGIN_THROTTLE_USERNAME_BURST", 5))
+LOGIN_THROTTLE_USERNAME_PER_MINUTE = float(os.environ.get("LOGIN_THROTTLE_USERNAME_PER_MINUTE", 2))
+LOGIN_THROTTLE_ADDRESS_BURST = int(os.environ.get("LOGIN_THROTTLE_ADDRESS_BURST", 30))
+LOGIN_THROTTLE_ADDRESS_PER_MINUTE = float(os.environ.get("LOGIN_THROTTLE_ADDRESS_PER_MINUTE", 30))
+# 'memory' (per process) or 'database' (shared by every worker process through the login_buckets table)
+LOGIN_THROTTLE_BACKEND = os.environ.get("LOGIN_THROTTLE_BACKEND", "memory")
+# Buckets kept in memory; the least recently used are forgotten (a full bucket holds no information)
+LOGIN_THROTTLE_MAX_KEYS = int(os.environ.get("LOGIN_THROTTLE_MAX_KEYS", 10000))
+# Seconds between deletions of refilled rows from login_buckets
+LOGIN_THROTTLE_GC_INTERVAL = 300
+
+
+class MemoryBuckets:
+    """
+    Token buckets of one process: per key, the tokens left and the time they were counted,
+    in an LRU bounded to `max_keys` entries.
+    """
+
+    def __init__(self, max_keys=LOGIN_THROTTLE_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, rate):
+        """
+        Takes a token from the key's bucket (`burst` tokens, refilled at `rate` per second).
+        Returns 0 if it had one, else the seconds until it will.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class DatabaseBuckets:
+    """
+    Token buckets in the login_buckets table, shared by every process using the database.
+    A bucket is read, refilled and decremented by a single upsert, so concurrent workers can't
+    both take its last token.
+    """
+
+    def __init__(self, refill_time, gc_interval=LOGIN_THROTTLE_GC_INTERVAL):
+        self.refill_time = refill_time
+        self.gc_interval = gc_interval
+        self._next_collection = 0
+
+    def take(self, key, burst, rate):
+        now = time.time()
+        rows = db.execute(
+            """
+            INSERT INTO login_buckets (key, tokens, updated_at) VALUES (:key, :burst - 1, :now)
+            ON CONFLICT (key) DO UPDATE SET
+                tokens = MIN(:burst, tokens + (excluded.updated_at - updated_at) * :rate) - 1,
+                updated_at = excluded.updated_at
+            WHERE MIN(:burst, tokens + (excluded.updated_at - updated_at) * :rate) >= 1
+            RETURNING tokens
+            """,
+            key=key,
+            burst=burst,
+            rate=rate,
+            now=now,
+        )
+        if now >= self._next_collection:
+            self._next_collection = now + self.gc_interval
+            self.collect(now)
+        if rows:
+            return 0
+        # Empty bucket: it was left unchanged, read how long it takes to get a token back
+        rows = db.execute("SELECT tokens, updated_at FROM login_buckets WHERE key = ?", key)
+        tokens = min(burst, rows[0]["tokens"] + (now - rows[0]["updated_at"]) * rate) if rows else burst
+        return max((1 - tokens) / rate, 0)
+
+    def collect(self, now=None):
+        """
+        Deletes the rows of buckets that had time to refill (a full bucket is the same as no row),
+        returns how many.
+        """
+        cutoff = (now or time.time()) - self.refill_time
+        return db.execute("DELETE FROM login_buckets WHERE updated_at < ?", cutoff)
+
+
+class LoginThrottle:
+    """
+    Limits login attempts per username and per client address with token buckets, so that
+    a credential-stuffing burst is refused before any password hash is computed.
+    """
+
+    def __init__(
+        self,
+        backend=LOGIN_THROTTLE_BACKEND,
+        username_burst=LOGIN_THROTTLE_USERNAME_BURST,
+        username_per_minute=LOGIN_THROTTLE_USERNAME_PER_MINUTE,
+        address_burst=LOGIN_THROTTLE_ADDRESS_BURST,
+        address_per_minute=LOGIN_THROTTLE_ADDRESS_PER_MINUTE,
+    ):
+        self.limits = {
+            "username": (username_burst, username_per_minute / 60),
+            "address": (address_burst, address_per_minute / 60),
+        }
+        if backend == "database":
+            self.buckets = DatabaseBuckets(max(burst / rate for burst, rate in self.limits.values()))
+        elif backend == "memory":
+            self.buckets = MemoryBuckets()
+        else:
+            raise ValueError(f"Unknown login throttle backend: {backend}")
+        self._lock = threading.Lock()
+        self.allowed = self.blocked = 0
+
+    def attempt(self, username, address):
+        """
+        Records a login attempt. Returns 0 if it may proceed, else the number of seconds
+        (rounded up) before the username or address gets another attempt.
+        The address is checked first, so a blocked address doesn't use up the username's attempts.
+        """
+        wait = 0
+        for kind, value in (("address", address or "unknown"), ("username", username.lower())):
+            burst, rate = self.limits[kind]
+            wait = self.buckets.take(f"{kind}:{value}", burst, rate)
+            if wait:
+                break
+        with self._lock:
+            if wait:
+                self.blocked += 1
+            else:
+                self.allowed += 1
+        return math.ceil(wait)
+
+    def stats(self):
+        """
+        Returns the allowed and blocked attempt counters of this process.
+        """
+        with self._lock:
+            return {"allowed": self.allowed, "blocked": self.blocked}
+
+
+# Shared throttle used by the login view
+login_throttle = LoginThrottle()
@@ -0,0 +1,364 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from .cache import bump_version
+from .database import db, next_user_id
+from .task import Task
+
+# Number of rows inserted per transaction during an import
+IMPORT_BATCH_SIZE = 2000
+# Maximum number of row errors kept in an import report
+MAX_REPORTED_ERRORS = 100
+# File formats accepted by import and export
+FORMATS = ("csv", "ndjson")
+
+
+def format_for(filename):
+    """
+    Guesses the file format from a file name: NDJSON for .ndjson/.jsonl, CSV otherwise.
+    """
+    return "ndjson" if filename.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def _read_rows(stream, fmt):
+    """
+    Yields (line number, row dict) pairs from a CSV (with a header) or NDJSON stream,
+    one row at a time. Binary streams, such as uploaded files, are decoded as UTF-8.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Invalid format. Must be one of: {', '.join(FORMATS)}")
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e.msg}")
+            continue
+        if not isinstance(row, dict):
+            yield line_number, ValueError("Each line must be a JSON object")
+            continue
+        yield line_number, row
+
+
+def _text(row, key):
+    """
+    Returns a stripped text field of a row, or None if it is missing or empty.
+    Raises ValueError for a value that isn't a string (a JSON number, list or object).
+    """
+    value = row.get(key)
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{key} must be a string")
+    return value.strip() or None
+
+
+class _Importer:
+    """
+    Validates rows and inserts them in batches of `batch_size`, each in one transaction.
+    IDs of a batch are reserved from the user's sequence of `table` with a single counter update,
+    and each row is inserted with `sql` as (id, user_id) followed by the values parse() returned.
+    """
+
+    def __init__(self, user_id, batch_size, table, sql):
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.table = table
+        self.sql = sql
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self._batch = []
+
+    def fail(self, line, error):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": str(error)})
+
+    def add(self, values):
+        self._batch.append(values)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Inserts the pending batch, numbering its rows from the user's sequence.
+        """
+        if not self._batch:
+            return
+        with db.transaction():
+            rows = self.resolve(self._batch)
+            last_id = next_user_id(self.table, self.user_id, len(rows))
+            first_id = last_id - len(rows) + 1
+            db.executemany(
+                self.sql,
+                [(first_id + i, self.user_id) + values for i, values in enumerate(rows)],
+            )
+            bump_version(self.user_id)
+        self.imported += len(self._batch)
+        self._batch = []
+
+    def resolve(self, batch):
+        """
+        Returns the values to insert for a batch of parsed rows; runs inside the batch's transaction.
+        """
+        return batch
+
+    def report(self):
+        return {"imported": self.imported, "failed": self.failed, "errors": self.errors}
+
+
+class _TaskImporter(_Importer):
+    def __init__(self, user_id, batch_size):
+        super().__init__(
+            user_id,
+            batch_size,
+            "tasks",
+            """
+            INSERT INTO tasks (id, user_id, project_id, title, description, detailed_description,
+                               creation_date, deadline, status, priority, completed_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+        )
+        # Project title -> ID, loaded once; missing projects are created with the batch that uses them
+        self.projects = {
+            project["title"]: project["id"]
+            for project in db.execute(
+                "SELECT id, title FROM projects WHERE user_id = ?", user_id
+            )
+        }
+        self.now = datetime.now().strftime(Task.DATE_FORMAT)
+
+    def resolve(self, batch):
+        """
+        Replaces the project titles of a batch with project IDs, creating the missing projects in
+        the batch's transaction, so they are only kept (and cached lists refreshed) with their tasks.
+        """
+        created = {}
+        for title in dict.fromkeys(values[0] for values in batch):  # In order of first use
+            if title and title not in self.projects:
+                created[title] = next_user_id("projects", self.user_id)
+        db.executemany(
+            "INSERT INTO projects (id, user_id, title) VALUES (?, ?, ?)",
+            [(project_id, self.user_id, title) for title, project_id in created.items()],
+        )
+        projects = {**self.projects, **created}
+        # A failed batch rolls its projects back, but also ends the import, so the IDs can be kept now
+        self.projects = projects
+        return [(projects[values[0]] if values[0] else None,) + values[1:] for values in batch]
+
+    def parse(self, row):
+        title = _text(row, "title")
+        if not title:
+            raise ValueError("Title is required")
+        status = _text(row, "status") or "to do"
+        Task.validate_status(status)
+        priority = _text(row, "priority") or "medium"
+        Task.validate_priority(priority)
+        deadline = Task._format_date(_text(row, "deadline"))
+        completed_date = Task._format_date(_text(row, "completed_date"))
+        if status == "done" and not completed_date:
+            completed_date = self.now
+        return (
+            _text(row, "project"),  # Title, resolved to an ID when the batch is inserted
+            title,
+            _text(row, "description") or "",
+            _text(row, "detailed_description") or "",
+            Task._format_date(_text(row, "creation_date")) or self.now,
+            deadline,
+            status,
+            priority,
+            completed_date,
+        )
+
+
+class _ProjectImporter(_Importer):
+    def __init__(self, user_id, batch_size):
+        super().__init__(
+            user_id,
+            batch_size,
+            "projects",
+            """
+            INSERT INTO projects (id, user_id, title, description, detailed_description,
+                                  start_date, deadline, status, priority)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+        )
+
+    def parse(self, row):
+        title = _text(row, "title")
+        if not title:
+            raise ValueError("Title is required")
+        status = _text(row, "status") or "to do"
+        Task.validate_status(status)
+        priority = _text(row, "priority") or "medium"
+        Task.validate_priority(priority)
+        start_date = _text(row, "start_date")
+        deadline = _text(row, "deadline")
+        return (
+            title,
+            _text(row, "description") or "",
+            _text(row, "detailed_description") or "",
+            date.fromisoformat(start_date).isoformat() if start_date else date.today().isoformat(),
+            date.fromisoformat(deadline).isoformat() if deadline else None,
+            status,
+            priority,
+        )
+
+
+def import_rows(user_id, stream, fmt="csv", kind="tasks", batch_size=IMPORT_BATCH_SIZE):
+    """
+    Imports tasks or projects for the user from a CSV or NDJSON stream, reading it row by row.
+    Task rows may name their project by title in a 'project' field; missing projects are created.
+    Invalid rows are skipped and reported; valid rows are inserted in batched transactions.
+    Returns {"imported": n, "failed": n, "errors": [{"line": n, "error": message}, ...]}.
+    """
+    if kind == "tasks":
+        importer = _TaskImporter(user_id, batch_size)
+    elif kind == "projects":
+        importer = _ProjectImporter(user_id, batch_size)
+    else:
+        raise ValueError("Invalid kind. Must be 'tasks' or 'projects'")
+
+    for line, row in _read_rows(stream, fmt):
+        if isinstance(row, Exception):
+            importer.fail(line, row)
+            continue
+        try:
+            values = importer.parse(row)
+        except ValueError as e:
+            importer.fail(line, e)
+            continue
+        importer.add(values)
+    importer.flush()
+    return importer.report()
+
+
+# Number of rows fetched from SQLite and written to the response at a time during an export
+EXPORT_CHUNK_SIZE = 1000
+# Columns that an export's date range can filter on
+EXPORT_DATE_FIELDS = {
+    "tasks": ("deadline", "creation_date", "completed_date"),
+    "projects": ("deadline", "start_date"),
+}
+
+_EXPORT_COLUMNS = {
+    "tasks": (
+        "id", "title", "description", "detailed_description", "status", "priority",
+        "creation_date", "deadline", "completed_date", "project",
+    ),
+    "projects": (
+        "id", "title", "description", "detailed_description", "status", "priority",
+        "start_date", "deadline",
+    ),
+}
+
+
+def _export_query(user_id, kind, status, project_id, start, end, date_field):
+    """
+    Builds the export query and its parameters from the filters.
+    """
+    if kind == "tasks":
+        sql = """
+            SELECT t.id, t.title, t.description, t.detailed_description, t.status, t.priority,
+                   t.creation_date, t.deadline, t.completed_date, p.title AS project
+            FROM tasks t
+            LEFT JOIN projects p ON p.id = t.project_id AND p.user_id = t.user_id
+            WHERE t.user_id = ?
+        """
+        prefix = "t."
+    elif kind == "projects":
+        sql = """
+            SELECT id, title, description, detailed_description, status, priority, start_date, deadline
+            FROM projects
+            WHERE user_id = ?
+        """
+        prefix = ""
+    else:
+        raise ValueError("Invalid kind. Must be 'tasks' or 'projects'")
+
+    values = [user_id]
+    if status:
+        Task.validate_status(status)
+        sql += f" AND {prefix}status = ?"
+        values.append(status)
+    if project_id is not None and kind == "tasks":
+        sql += " AND t.project_id = ?"
+        values.append(project_id)
+    if date_field not in EXPORT_DATE_FIELDS[kind]:
+        raise ValueError(
+            f"Invalid date field. Must be one of: {', '.join(EXPORT_DATE_FIELDS[kind])}"
+        )
+    # Tasks store datetimes and projects store dates, both as sortable ISO-8601 text
+    to_bound = Task._format_date if kind == "tasks" else (lambda value: date.fromisoformat(value).isoformat())
+    if start:
+        sql += f" AND {prefix}{date_field} >= ?"
+        values.append(to_bound(start))
+    if end:
+        sql += f" AND {prefix}{date_field} < ?"
+        values.append(to_bound(end))
+    sql += f" ORDER BY {prefix}id"
+    return sql, values
+
+
+def export_rows(
+    user_id,
+    fmt="csv",
+    kind="tasks",
+    status=None,
+    project_id=None,
+    start=None,
+    end=None,
+    date_field="deadline",
+    chunk_size=EXPORT_CHUNK_SIZE,
+):
+    """
+    Exports the user's tasks or projects as CSV or NDJSON text chunks.
+    Filters: status, project_id (tasks only) and a [start, end) range on date_field.
+    The filters are validated immediately (raising ValueError); the returned generator then reads
+    the rows through a cursor, `chunk_size` at a time, so memory stays flat whatever the row count.
+    Keep the database connection of the current thread (the request context) alive while iterating.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Invalid format. Must be one of: {', '.join(FORMATS)}")
+    sql, values = _export_query(user_id, kind, status, project_id, start, end, date_field)
+    columns = _EXPORT_COLUMNS[kind]
+
+    def generate():
+        cursor = db.connection().execute(sql, values)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        try:
+            if fmt == "csv":
+                writer.writerow(columns)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if fmt == "csv":
+                    writer.writerows(rows)
+                else:
+                    for row in rows:
+                        buffer.write(json.dumps(dict(zip(columns, row)), separators=(",", ":")))
+                        buffer.write("\n")
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        finally:
+            cursor.close()
+
+    return generate()
@@ -1,6 +1,9 @@
+from .cache import bump_version
 from .database import db
-from werkzeug.security import check_password_hash, generate_password_hash
+from .passwords import password_hasher
 from datetime import datetime
+import hashlib
+import secrets
 
 
 class User:
@@ -29,9 +32,9 @@ class User:
     def create(username, email, password):
         """
         Creates a new user with the provided username, email, and password.
-        The password is hashed before being stored in the database.
+        The password is hashed (in the hashing pool) before being stored in the database.
         """
-        hash_ = generate_password_hash(password)
+        hash_ = password_hasher.hash(password)
         db.execute(
             "INSERT INTO users (username, email, hash) VALUES (?, ?, ?)",
             username,
@@ -45,22 +48,26 @@ class User:
         Updates the user's username, email, and optionally password.
         If a password is provided, it is hashed before being stored.
         """
-        if password:
-            hash_ = generate_password_hash(password)
-            db.execute(
-                "UPDATE users SET username = ?, email = ?, hash = ? WHERE id = ?",
-                username,
-                email,
-                hash_,
-                user_id,
-            )
-        else:
-            db.execute(
-                "UPDATE users SET username = ?, email = ? WHERE id = ?",
-                username,
-                email,
-                user_id,
-            )
+        # Hash before taking the write lock
+        hash_ = password_hasher.hash(password) if password else None
+        with db.transaction():
+            if hash_:
+                db.execute(
+                    "UPDATE users SET username = ?, email = ?, hash = ? WHERE id = ?",
+                    username,
+                    email,
+                    hash_,
+                    user_id,
+                )
+            else:
+                db.execute(
+                    "UPDATE users SET username = ?, email = ? WHERE id = ?",
+                    username,
+                    email,
+                    user_id,
+                )
+            # Pages show the username, so cached copies must be revalidated
+            bump_version(user_id)
 
     @staticmethod
     def get_by_username(username):
@@ -86,8 +93,47 @@ class User:
         )
 
     @staticmethod
-    def check_password(stored_hash, password):
+    def check_password(stored_hash, password, user_id=None):
         """
         Checks if the provided password matches the stored hash.
+        When it does and the hash uses an outdated method or cost, the user's hash (if user_id is given)
+        is replaced by one with the current settings.
+        """
+        matches, new_hash = password_hasher.verify(stored_hash, password)
+        if new_hash and user_id is not None:
+            # Only if nobody changed the password meanwhile
+            db.execute("UPDATE users SET hash = ? WHERE id = ? AND hash = ?", new_hash, user_id, stored_hash)
+        return matches
+
+    @staticmethod
+    def _token_digest(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @staticmethod
+    def has_calendar_feed(user_id):
+        """
+        Returns whether the user has a calendar feed token.
         """
-        return check_password_hash(stored_hash, password)
\ No newline at end of file
+        rows = db.execute("SELECT calendar_token_hash FROM users WHERE id = ?", user_id)
+        return bool(rows and rows[0]["calendar_token_hash"])
+
+    @staticmethod
+    def reset_calendar_token(user_id):
+        """
+        Creates a calendar feed token for the user and returns it, replacing the previous one so its
+        feed URL stops working. Only a SHA-256 digest is stored: the token can't be shown again.
+        """
+        token = secrets.token_urlsafe(24)
+        db.execute(
+            "UPDATE users SET calendar_token_hash = ? WHERE id = ?", User._token_digest(token), user_id
+        )
+        return token
+
+    @staticmethod
+    def get_by_calendar_token(token):
+        """
+        Retrieves the user owning a calendar feed token.
+        """
+        return db.execute(
+            "SELECT id FROM users WHERE calendar_token_hash = ?", User._token_digest(token)
+        )
@@ -0,0 +1,63 @@
+import os
+
+from gunicorn.app.base import BaseApplication
+
+from models import db
+
+# Production server settings (overridable from the environment or the `flask serve` options)
+SERVER_BIND = os.environ.get("SERVER_BIND", "127.0.0.1:8000")
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+SERVER_THREADS = int(os.environ.get("SERVER_THREADS", 4))
+SERVER_KEEPALIVE = int(os.environ.get("SERVER_KEEPALIVE", 5))  # Seconds
+SERVER_BACKLOG = int(os.environ.get("SERVER_BACKLOG", 2048))
+SERVER_TIMEOUT = int(os.environ.get("SERVER_TIMEOUT", 30))  # Seconds
+SERVER_GRACEFUL_TIMEOUT = int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))  # Seconds
+SERVER_MAX_REQUESTS = int(os.environ.get("SERVER_MAX_REQUESTS", 0))  # 0 never recycles workers
+
+
+def _pre_fork(server, worker):
+    # The preloaded app opened connections (migrations) in the master: no worker may inherit them
+    db.close_all()
+
+
+def _post_fork(server, worker):
+    # Start the worker with empty pools; each thread opens its own connection on first use
+    db.close_all()
+
+
+class Server(BaseApplication):
+    """
+    Runs the app under Gunicorn: `workers` processes forked from a master that imported the app once
+    (preload), each serving requests from `threads` threads. The master restarts workers that die
+    or hang for `timeout` seconds; SIGHUP replaces them gracefully (in-flight requests finish
+    within `graceful_timeout` seconds), and SIGUSR2 starts a new master with new code.
+    """
+
+    def __init__(self, app, **options):
+        self.application = app
+        self.options = {
+            "bind": SERVER_BIND,
+            "workers": SERVER_WORKERS,
+            "threads": SERVER_THREADS,
+            "keepalive": SERVER_KEEPALIVE,
+            "backlog": SERVER_BACKLOG,
+            "timeout": SERVER_TIMEOUT,
+            "graceful_timeout": SERVER_GRACEFUL_TIMEOUT,
+            "max_requests": SERVER_MAX_REQUESTS,
+            **{key: value for key, value in options.items() if value is not None},
+        }
+        # Spread recycling so the workers don't all restart at once
+        self.options.setdefault("max_requests_jitter", self.options["max_requests"] // 10)
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set("preload_app", True)
+        # More than one thread selects the threaded worker, which keeps connections alive
+        self.cfg.set("worker_class", "gthread" if self.options["threads"] > 1 else "sync")
+        self.cfg.set("pre_fork", _pre_fork)
+        self.cfg.set("post_fork", _post_fork)
+
+    def load(self):
+        return self.application
@@ -0,0 +1,214 @@
+import hashlib
+import os
+import secrets
+import threading
+import time
+from datetime import timedelta
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+
+from models import db
+
+
+def _digest(sid):
+    """
+    Returns the key a session is stored under: its ID is only ever kept in the browser's cookie.
+    """
+    return hashlib.sha256(sid.encode()).hexdigest()
+
+
+class DatabaseSession(SecureCookieSession):
+    """
+    Session stored in the `sessions` table. Remembers the serialized data it was loaded from,
+    so an unchanged session is not written back.
+    """
+
+    def __init__(self, initial=None, sid=None, data=None, expires_at=0):
+        super().__init__(initial)
+        self.sid = sid
+        self.data = data
+        self.expires_at = expires_at
+        # Clearing the session (login, logout) gives it a new ID, against session fixation
+        self.renew = False
+
+    def clear(self):
+        super().clear()
+        self.renew = True
+
+
+class DatabaseSessionInterface(SessionInterface):
+    """
+    Keeps sessions in the app's SQLite database, replacing one file per session.
+    The browser's cookie holds a random session ID; the row, keyed by its SHA-256 digest, holds the
+    data as tagged JSON (like Flask's cookie sessions) and an expiry time. A request reads its row once
+    and writes it back only when the data changed, or every SESSION_TOUCH_INTERVAL seconds to extend
+    an idle session. Empty sessions are never stored. Expired rows are deleted in batches of
+    SESSION_GC_BATCH, at most every SESSION_GC_INTERVAL seconds per process.
+
+    Settings (app.config, defaulting to the environment variables of the same name):
+    SESSION_BACKEND ('database', or 'cookie' for Flask's signed cookies, which need SECRET_KEY),
+    SESSION_LIFETIME (seconds), SESSION_TOUCH_INTERVAL, SESSION_GC_INTERVAL and SESSION_GC_BATCH.
+    """
+
+    serializer = TaggedJSONSerializer()
+    session_class = DatabaseSession
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._next_collection = 0
+        self.reads = self.misses = self.writes = self.skips = self.touches = self.deletes = self.collected = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SESSION_BACKEND", os.environ.get("SESSION_BACKEND", "database"))
+        app.config.setdefault("SESSION_LIFETIME", int(os.environ.get("SESSION_LIFETIME", 31 * 24 * 3600)))
+        app.config.setdefault("SESSION_TOUCH_INTERVAL", int(os.environ.get("SESSION_TOUCH_INTERVAL", 3600)))
+        app.config.setdefault("SESSION_GC_INTERVAL", int(os.environ.get("SESSION_GC_INTERVAL", 300)))
+        app.config.setdefault("SESSION_GC_BATCH", int(os.environ.get("SESSION_GC_BATCH", 500)))
+        app.permanent_session_lifetime = timedelta(seconds=app.config["SESSION_LIFETIME"])
+        self.config = app.config
+        app.extensions["sessions"] = self
+
+        if app.config["SESSION_BACKEND"] == "cookie":
+            # Flask's default interface: the whole session in a signed cookie, nothing stored
+            app.config.setdefault("SECRET_KEY", os.environ.get("SECRET_KEY"))
+            if not app.config["SECRET_KEY"]:
+                raise RuntimeError("SESSION_BACKEND=cookie requires SECRET_KEY")
+            return
+        if app.config["SESSION_BACKEND"] != "database":
+            raise RuntimeError(f"Unknown SESSION_BACKEND: {app.config['SESSION_BACKEND']}")
+        app.session_interface = self
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def open_session(self, app, request):
+        # Static files never use the session: don't read it for them
+        if app.static_url_path and request.path.startswith(app.static_url_path + "/"):
+            return self.make_null_session(app)
+
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return self.session_class()
+
+        rows = db.execute(
+            "SELECT data, expires_at FROM sessions WHERE id = ? AND expires_at > ?", _digest(sid), int(time.time())
+        )
+        if rows:
+            try:
+                session = self.serializer.loads(rows[0]["data"])
+            except ValueError:
+                session = None
+            if isinstance(session, dict):
+                self._count("reads")
+                return self.session_class(session, sid, rows[0]["data"], rows[0]["expires_at"])
+        # Expired or unknown: start a new session (under a new ID if it gets data)
+        self._count("misses")
+        return self.session_class()
+
+    def _set_cookie(self, app, session, response, sid):
+        response.set_cookie(
+            self.get_cookie_name(app),
+            sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=self.get_cookie_domain(app),
+            path=self.get_cookie_path(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+            partitioned=self.get_cookie_partitioned(app),
+        )
+
+    def save_session(self, app, session, response):
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            # Emptied (logout, or the last flashed message shown): forget it on both sides
+            if session.sid is not None:
+                db.execute("DELETE FROM sessions WHERE id = ?", _digest(session.sid))
+                self._count("deletes")
+                response.delete_cookie(
+                    self.get_cookie_name(app),
+                    domain=self.get_cookie_domain(app),
+                    path=self.get_cookie_path(app),
+                    secure=self.get_cookie_secure(app),
+                    samesite=self.get_cookie_samesite(app),
+                    httponly=self.get_cookie_httponly(app),
+                    partitioned=self.get_cookie_partitioned(app),
+                )
+            return
+
+        now = int(time.time())
+        lifetime = self.config["SESSION_LIFETIME"]
+        data = self.serializer.dumps(dict(session))
+
+        if session.sid is not None and not session.renew and data == session.data:
+            if session.expires_at - now > lifetime - self.config["SESSION_TOUCH_INTERVAL"]:
+                self._count("skips")
+                return
+            # Unchanged but idle for a while: only push the expiry back
+            db.execute("UPDATE sessions SET expires_at = ? WHERE id = ?", now + lifetime, _digest(session.sid))
+            self._count("touches")
+            if session.permanent:
+                self._set_cookie(app, session, response, session.sid)
+            return
+
+        sid = session.sid
+        if sid is None or session.renew:
+            if sid is not None:
+                db.execute("DELETE FROM sessions WHERE id = ?", _digest(sid))
+            sid = secrets.token_urlsafe(32)
+        db.execute(
+            "INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)", _digest(sid), data, now + lifetime
+        )
+        self._count("writes")
+        if sid != session.sid or session.permanent:
+            self._set_cookie(app, session, response, sid)
+
+        if now >= self._next_collection:
+            self._next_collection = now + self.config["SESSION_GC_INTERVAL"]
+            self.collect(self.config["SESSION_GC_BATCH"])
+
+    def collect(self, limit):
+        """
+        Deletes up to `limit` expired sessions and returns how many were deleted.
+        Small batches keep the write lock short while requests are being served.
+        """
+        deleted = db.execute(
+            "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions WHERE expires_at <= ? LIMIT ?)",
+            int(time.time()),
+            limit,
+        )
+        self._count("collected", deleted)
+        return deleted
+
+    def purge(self, batch_size=None):
+        """
+        Deletes every expired session, one batch at a time. Returns how many were deleted.
+        """
+        batch_size = batch_size or self.config["SESSION_GC_BATCH"]
+        total = 0
+        while True:
+            deleted = self.collect(batch_size)
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+    def stats(self):
+        """
+        Returns the session read, write and garbage collection counters of this process.
+        """
+        with self._lock:
+            return {
+                "reads": self.reads,
+                "misses": self.misses,
+                "writes": self.writes,
+                "skipped_writes": self.skips,
+                "touches": self.touches,
+                "deletes": self.deletes,
+                "collected": self.collected,
+            }
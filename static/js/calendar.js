@@ -1,6 +1,5 @@
 document.addEventListener('DOMContentLoaded', function() {
     const calendarEl = document.getElementById('calendar');
-    const events = JSON.parse(document.getElementById('calendar-data').textContent);  // Pass events from Flask
 
     const calendar = new FullCalendar.Calendar(calendarEl, {
         initialView: 'dayGridMonth',  // Default view
@@ -9,7 +8,14 @@ document.addEventListener('DOMContentLoaded', function() {
             center: 'title',
             right: 'dayGridMonth,timeGridWeek,timeGridDay'
         },
-        events: events,
+        // Remote event source: FullCalendar requests ?start=...&end=... for each range it displays
+        events: {
+            url: calendarEl.dataset.eventsUrl,
+            failure: function() {
+                console.error('Could not load the calendar events');
+            }
+        },
+        lazyFetching: true,  // Reuse fetched events when the new range is inside an already loaded one
         eventClick: function(info) {
             // Update modal content
             document.getElementById('modal-title').textContent = info.event.title;
@@ -0,0 +1,18 @@
+// "Load more" buttons: replace the button with the next page it points to (cards plus, if any, the next button)
+document.addEventListener('click', async function (event) {
+    const button = event.target.closest('[data-load-more]');
+    if (!button || button.disabled) {
+        return;
+    }
+    button.disabled = true;
+    try {
+        const response = await fetch(button.dataset.loadMore, { headers: { 'Accept': 'text/html' } });
+        if (!response.ok) {
+            throw new Error(response.statusText);
+        }
+        button.outerHTML = await response.text();
+    } catch (error) {
+        console.error('Could not load more items:', error);
+        button.disabled = false;
+    }
+});